@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Offline benchmarks of the encode and decode hot paths, with regression gates
+
+    python3 benchmarks/bench.py                   # differential check, benchmarks, compare with baseline.json
+    python3 benchmarks/bench.py --update          # record the results as the new baseline
+    python3 benchmarks/bench.py --check           # differential check only
+
+The differential check first compares every fast path (encode(), encode_bytes(), cached frames, frame
+templates, mutable frames, codebooks, batch encoding and decoding, from_dump() of bits and of packed frames,
+pulse trains, Broadlink and Pronto codes) with the frozen reference implementation in reference_mitsubishi.py,
+for every state of both command classes; any difference fails the run. Transmitter formats are checked against
+converters written here independently of hvac_ir.formats, fed with pulse trains rebuilt from the reference
+bitstrings.
+
+Every benchmark then runs over a representative mix of states and over all the states (the worst case for
+caches and branch patterns), with the SG14D clock fixed. Results are ops/sec and peak bytes allocated per
+operation (tracemalloc); the run fails if any of them is worse than the baseline by more than --threshold.
+Baselines depend on the machine: record them again with --update when it changes.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference_mitsubishi  # noqa: E402 pylint: disable=wrong-import-position
+from hvac_ir import mitsubishi  # noqa: E402 pylint: disable=wrong-import-position
+from hvac_ir.cache import EncodeCache  # noqa: E402 pylint: disable=wrong-import-position
+from hvac_ir.codebook import Codebook, write_codebook  # noqa: E402 pylint: disable=wrong-import-position
+from hvac_ir.codec import bitstring_to_bytes  # noqa: E402 pylint: disable=wrong-import-position
+from hvac_ir.frame import FrameTemplate, MutableFrame  # noqa: E402 pylint: disable=wrong-import-position
+
+try:
+    import numpy
+
+    from hvac_ir.batch import decode_batch, encode_batch
+except ImportError:  # optional dependency
+    numpy = None
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CLASSES = ("MitsubishiCommand_W001CP", "MitsubishiCommand_SG14D")
+FIXED_TIME = datetime.datetime(2020, 1, 1, 15, 53)
+
+
+class _FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FIXED_TIME
+
+
+class _FixedDatetimeModule(object):
+    datetime = _FixedDatetime
+
+
+def _fixed_clock():
+    return FIXED_TIME
+
+
+def _states(command_class, mix):
+    """return a list of state dicts: every state, or a representative mix of usual settings"""
+    names = tuple(command_class.protocol_parameters)
+    if mix == "all":
+        return [dict(zip(names, _)) for _ in itertools.product(*(command_class.protocol_parameters[n] for n in names))]
+    return [
+        {"power": power, "hvac_mode": hvac_mode, "temperature": temperature}
+        for power in (True, False)
+        for hvac_mode in ("heat", "cold")
+        for temperature in range(20, 27)
+    ]
+
+
+def _command(command_class, state):
+    if command_class is mitsubishi.MitsubishiCommand_SG14D:
+        return command_class(clock=_fixed_clock, **state)
+    return command_class(**state)
+
+
+# differential check
+
+
+def _reference_train(reference, bitstring):
+    """return the mark / space durations of a wire order bitstring of the reference implementation"""
+    config = reference.pyslinger_protocol_config
+    train = [config["leading_pulse_duration"], config["leading_gap_duration"]]
+    for bit in bitstring:
+        if bit == "1":
+            train += [config["one_pulse_duration"], config["one_gap_duration"]]
+        else:
+            train += [config["zero_pulse_duration"], config["zero_gap_duration"]]
+    train += [config["trailing_pulse_duration"], config["trailing_gap_duration"]]
+    return train * reference.protocol_repeats
+
+
+def _reference_broadlink(train, repeat):
+    """Broadlink packet of a train, written independently of hvac_ir.formats (ticks of 8192 / 269 us)"""
+    data = bytearray()
+    for duration in train:
+        ticks = int(duration * 269 / 8192)
+        data += bytes([0, ticks >> 8, ticks & 0xFF]) if ticks > 255 else bytes([ticks])
+    packet = bytearray([0x26, repeat, len(data) & 0xFF, len(data) >> 8]) + data + bytearray([0x0D, 0x05])
+    return bytes(packet + bytearray(-(len(packet) + 4) % 16))
+
+
+def _reference_pronto(train, frequency):
+    """Pronto hex code of a train, written independently of hvac_ir.formats"""
+    word = round(1000000 / (frequency * 0.241246))
+    words = [0, word, len(train) // 2, 0] + [round(duration / (word * 0.241246)) for duration in train]
+    return " ".join("%04X" % _ for _ in words)
+
+
+def _mutable_frame(command_class, previous, state, lsb):
+    """return the frame rendered by a MutableFrame of previous after setting all the values of state"""
+    frame = MutableFrame(_command(command_class, previous), lsb)
+    for name, value in state.items():
+        setattr(frame, name, value)
+    return bytes(frame.render(FIXED_TIME))
+
+
+def differential_check():
+    """compare every fast path with the reference implementation, return a list of mismatches"""
+    reference_mitsubishi.datetime = _FixedDatetimeModule
+    mismatches = []
+    directory = tempfile.mkdtemp()
+    try:
+        for name in CLASSES:
+            mismatches.extend(_differential_check(name, os.path.join(directory, name + ".codebook")))
+    finally:
+        shutil.rmtree(directory)
+    return mismatches
+
+
+def _differential_check(name, codebook_path):
+    reference, command_class = getattr(reference_mitsubishi, name), getattr(mitsubishi, name)
+    states = _states(command_class, "all")
+    mismatches = []
+    expected = []
+    results = []
+    write_codebook(command_class, codebook_path)
+    with Codebook(codebook_path) as codebook:
+        for index, state in enumerate(states):
+            msb = reference(**state).encode(lsb=False)
+            lsb = reference(**state).encode(lsb=True)
+            expected.append(bitstring_to_bytes(lsb))
+            results.append(reference.from_dump(msb))
+            command = _command(command_class, state)
+            state_tuple = tuple(state[_] for _ in codebook.parameters)
+            train = _reference_train(reference, lsb)
+            checks = {
+                "encode(lsb=False)": command.encode(lsb=False) == msb,
+                "encode(lsb=True)": command.encode(lsb=True) == lsb,
+                "encode_bytes(lsb=False)": command.encode_bytes(lsb=False) == bitstring_to_bytes(msb),
+                "encode_bytes(lsb=True)": command.encode_bytes(lsb=True) == expected[-1],
+                # same keys in the same order, they are the columns of the command line tool
+                "from_dump(bits)": list(command_class.from_dump(msb).items()) == list(results[-1].items()),
+                "from_dump(bytes)": command_class.from_dump(bitstring_to_bytes(msb)) == results[-1],
+                "encode_pulses()": list(command.encode_pulses()) == train,
+                "encode_broadlink()": command.encode_broadlink(index % 4) == _reference_broadlink(train, index % 4),
+                "encode_pronto()": command.encode_pronto()
+                == _reference_pronto(train, reference.pyslinger_protocol_config["frequency"]),
+                "FrameTemplate.render()": bytes(FrameTemplate(command).render(FIXED_TIME)) == expected[-1],
+                # from another state, alternating bit orders
+                "MutableFrame.render()": _mutable_frame(command_class, states[index - 1], state, index % 2 == 0)
+                == (expected[-1] if index % 2 == 0 else bitstring_to_bytes(msb)),
+                "Codebook.encode()": codebook.encode(state_tuple, time_of_day=FIXED_TIME) == expected[-1],
+                "Codebook.decode()": codebook.decode(expected[-1], lsb=True) == state_tuple,
+            }
+            command_class.encode_cache = EncodeCache()
+            try:
+                checks["cached encode_bytes()"] = all(command.encode_bytes() == expected[-1] for _ in range(2))
+            finally:
+                command_class.encode_cache = None
+            mismatches.extend("%s %s %s" % (name, check, state) for check, ok in checks.items() if not ok)
+    if numpy is not None:
+        columns = {_: [state[_] for state in states] for _ in command_class.protocol_parameters}
+        frames = encode_batch(command_class, lsb=True, time_of_day=FIXED_TIME, **columns)
+        mismatches.extend(
+            "%s encode_batch() %s" % (name, state)
+            for state, frame, ok in zip(states, frames, expected)
+            if bytes(frame) != ok
+        )
+        decoded = decode_batch(command_class, numpy.array([list(_) for _ in expected], dtype=numpy.uint8), lsb=True)
+        for index, (state, result) in enumerate(zip(states, results)):
+            row = {_: decoded[_][index] for _ in result}
+            if row != result or not decoded["valid"][index]:
+                mismatches.append("%s decode_batch() %s" % (name, state))
+    return mismatches
+
+
+# benchmarks
+
+
+def _benchmarks(command_class, mix):
+    """yield (name, function, argument list, operations per call) for every benchmark of command_class"""
+    model = command_class.__name__.rsplit("_", 1)[-1]
+    states = _states(command_class, mix)
+    commands = [_command(command_class, _) for _ in states]
+    msb_bits = [_.encode(lsb=False) for _ in commands]
+    msb_frames = [_.encode_bytes(lsb=False) for _ in commands]
+    checksum_bits = [_[: (command_class.protocol_bytes - (6 if model == "W001CP" else 1)) * 8] for _ in msb_bits]
+    prefix = "%s.%s." % (model, mix)
+    yield prefix + "encode", lambda command: command.encode(), commands, 1
+    yield prefix + "encode_bytes", lambda command: command.encode_bytes(), commands, 1
+    yield prefix + "checksum", command_class.checksum, checksum_bits, 1
+    yield prefix + "from_dump_bits", command_class.from_dump, msb_bits, 1
+    yield prefix + "from_dump_bytes", command_class.from_dump, msb_frames, 1
+    if numpy is not None:
+        columns = {_: [state[_] for state in states] for _ in states[0]}
+        frames = numpy.array([list(_) for _ in msb_frames], dtype=numpy.uint8)
+        yield (
+            prefix + "encode_batch",
+            lambda columns: encode_batch(command_class, time_of_day=FIXED_TIME, **columns),
+            [columns],
+            len(states),
+        )
+        yield prefix + "decode_batch", lambda frames: decode_batch(command_class, frames), [frames], len(states)
+
+
+def _rate(function, arguments, operations, min_time, repeat=3):
+    """return the best operations per second of a few runs of at least min_time seconds"""
+    best = 0.0
+    for _ in range(repeat):
+        count = 0
+        started = time.perf_counter()
+        while True:
+            for argument in arguments:
+                function(argument)
+            count += len(arguments) * operations
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+
+def _allocated(function, arguments, operations):
+    """return the peak bytes allocated per operation by a call, once warmed up"""
+    function(arguments[0])
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        function(arguments[0])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - before) // operations
+
+
+def run_benchmarks(min_time, selected=None):
+    results = {}
+    for name in CLASSES:
+        for mix in ("typical", "all"):
+            for benchmark, function, arguments, operations in _benchmarks(getattr(mitsubishi, name), mix):
+                if selected and not any(_ in benchmark for _ in selected):
+                    continue
+                results[benchmark] = {
+                    "ops_per_sec": round(_rate(function, arguments, operations, min_time), 1),
+                    "alloc_bytes": _allocated(function, arguments, operations),
+                }
+                sys.stderr.write(
+                    "%-40s %12.0f ops/s %8d bytes/op\n"
+                    % (benchmark, results[benchmark]["ops_per_sec"], results[benchmark]["alloc_bytes"])
+                )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """return a list of the regressions of results against baseline results"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["ops_per_sec"] < expected["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                "%s: %.0f ops/s, baseline %.0f ops/s" % (name, result["ops_per_sec"], expected["ops_per_sec"])
+            )
+        # small allocations vary with the interpreter internals
+        if result["alloc_bytes"] > expected["alloc_bytes"] * (1 + threshold) + 64:
+            regressions.append(
+                "%s: %d bytes/op, baseline %d bytes/op" % (name, result["alloc_bytes"], expected["alloc_bytes"])
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the encode and decode hot paths")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--update", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="tolerated slowdown, 0.25 is 25%%")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per benchmark run")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--check", action="store_true", help="only run the differential check")
+    parser.add_argument("--skip-check", action="store_true", help="do not run the differential check")
+    parser.add_argument("benchmarks", nargs="*", help="only run the benchmarks whose name contains one of these")
+    args = parser.parse_args()
+
+    if not args.skip_check:
+        mismatches = differential_check()
+        for mismatch in mismatches[:20]:
+            sys.stderr.write("MISMATCH %s\n" % mismatch)
+        if mismatches:
+            sys.stderr.write("differential check failed: %d mismatches\n" % len(mismatches))
+            return 1
+        sys.stderr.write("differential check passed\n")
+        if args.check:
+            return 0
+
+    results = run_benchmarks(args.min_time, args.benchmarks)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": None if numpy is None else numpy.__version__,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+    if args.update:
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        sys.stderr.write("baseline written to %s\n" % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        sys.stderr.write("no baseline %s, run with --update to record one\n" % args.baseline)
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        sys.stderr.write("REGRESSION %s\n" % regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+from .registry import decode, detect, get_protocol, protocols, register
+
+__all__ = ["decode", "detect", "get_protocol", "protocols", "register"]
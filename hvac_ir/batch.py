@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Vectorized encoding and decoding of many commands at once (requires numpy)
+
+Commands are given as columns, one array (or scalar, broadcast to every row) per encoded parameter of the
+command class; missing parameters take the default value of the command class constructor. Decoded frames
+are returned as columns too, one array per decoded field.
+
+    frames = encode_batch(MitsubishiCommand_W001CP, power=True, hvac_mode=modes, temperature=temperatures)
+    columns = decode_batch(MitsubishiCommand_W001CP, frames, lsb=True)
+"""
+
+import inspect
+
+from .codec import REVERSED_BYTES
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+
+class BatchValueError(ValueError):
+    """some rows of a batch hold invalid values, rows maps each parameter name to the indexes of its bad rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        details = ", ".join("%s %s" % (name, indexes[:10].tolist()) for name, indexes in rows.items())
+        super().__init__("invalid values in rows: %s" % details)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise RuntimeError("batch encoding and decoding require numpy")
+
+
+def _equal(column, value, is_bool):
+    """return the mask of the rows of column equal to value, telling True / False apart from 1 / 0"""
+    mask = column == value
+    if not isinstance(mask, numpy.ndarray):
+        # older numpy versions return a scalar False when comparing different types
+        mask = numpy.zeros(column.shape, dtype=bool)
+    return mask & is_bool if value.__class__ is bool else mask & ~is_bool
+
+
+def _is_bool(column):
+    if column.dtype.kind == "b":
+        return numpy.ones(column.shape, dtype=bool)
+    if column.dtype.kind == "O":
+        return numpy.frompyfunc(lambda _: _.__class__ is bool, 1, 1)(column).astype(bool)
+    return numpy.zeros(column.shape, dtype=bool)
+
+
+def _columns(command_class, columns):
+    """return the number of rows and a {name: 1-D array} dict with every encoded parameter"""
+    names = command_class.protocol_codec.names
+    unknown = set(columns) - set(names)
+    if unknown:
+        raise ValueError("unknown parameters: %s" % ", ".join(sorted(unknown)))
+    defaults = inspect.signature(command_class).parameters
+    arrays = {}
+    for name in names:
+        value = columns[name] if name in columns else defaults[name].default
+        if numpy.ndim(value) == 0:
+            value = [value]
+        if not isinstance(value, numpy.ndarray):
+            # keep python values (eg. "auto" and 1 in the same column) as they are
+            value = numpy.array(list(value), dtype=object)
+        arrays[name] = value
+        if arrays[name].ndim != 1:
+            raise ValueError("parameter %s is not a scalar nor a 1-D array" % name)
+    rows = max(len(_) for _ in arrays.values())
+    for name, array in arrays.items():
+        if len(array) == 1:
+            arrays[name] = numpy.repeat(array, rows)
+        elif len(array) != rows:
+            raise ValueError("parameter %s has %d rows instead of %d" % (name, len(array), rows))
+    return rows, arrays
+
+
+def encode_batch(command_class, lsb=True, bits=False, time_of_day=None, **columns):
+    """return an (N, protocol_bytes) uint8 array of frames, or an (N, protocol_bytes * 8) array of bits
+
+    Frames are the ones encode_bytes() would return (encode() if bits is True); rows holding invalid values
+    raise a BatchValueError listing them.
+    """
+    _require_numpy()
+    rows, arrays = _columns(command_class, columns)
+    frames = numpy.tile(numpy.frombuffer(command_class.protocol_codec.template, dtype=numpy.uint8), (rows, 1))
+    invalid = {}
+    for field in command_class.protocol_codec.fields:
+        if not field.encode:
+            continue
+        column = arrays[field.name]
+        is_bool = _is_bool(column)
+        raw = numpy.zeros(rows, dtype=numpy.uint8)
+        found = numpy.zeros(rows, dtype=bool)
+        for value, bits_value in field.values.items():
+            mask = _equal(column, value, is_bool)
+            raw[mask] = bits_value << field.bit
+            found |= mask
+        if not found.all():
+            bad = numpy.flatnonzero(~found)
+            invalid[field.name] = numpy.union1d(invalid.get(field.name, bad), bad)
+        frames[:, field.byte] |= raw
+    if invalid:
+        raise BatchValueError(invalid)
+    command_class.finish_batch(frames, time_of_day)
+    if lsb:
+        frames = numpy.frombuffer(REVERSED_BYTES, dtype=numpy.uint8)[frames]
+    if bits:
+        return numpy.unpackbits(frames, axis=1)
+    return frames
+
+
+def decode_batch(command_class, frames, lsb=False):
+    """decode an (N, protocol_bytes) array of frames or an (N, protocol_bytes * 8) array of bits
+
+    Return a dict holding an object array per decoded field and the checksum ("check_OK" / "check_BAD"), with
+    None in the rows from_dump() would reject, plus the boolean masks:
+    - header_valid: rows with the right header
+    - valid: rows with valid constants and fields, which from_dump() would decode
+    - checksum_ok: rows with the right checksum
+    Rows holding elements which are not bits (0 / 1) or bytes (0 ~ 255) are rejected, false in all the masks.
+    """
+    _require_numpy()
+    codec = command_class.protocol_codec
+    frames = numpy.asarray(frames)
+    size = command_class.protocol_bytes
+    if frames.ndim != 2 or frames.shape[1] not in (size, size * 8):
+        raise ValueError("expected (N, %d) bytes or (N, %d) bits, not %s" % (size, size * 8, frames.shape))
+    # rows with elements which are not bits (0 / 1) or bytes (0 ~ 255) are rejected, as by from_dump()
+    top = 1 if frames.shape[1] == size * 8 else 255
+    if frames.dtype.kind == "b":
+        in_range = numpy.ones(len(frames), dtype=bool)
+    else:
+        in_range = ((frames >= 0) & (frames <= top) & (frames == numpy.floor(frames))).all(axis=1)
+        if not in_range.all():
+            frames = numpy.where(in_range[:, None], frames, 0)
+    if frames.shape[1] == size * 8:
+        frames = numpy.packbits(frames.astype(bool), axis=1)
+    else:
+        frames = frames.astype(numpy.uint8, copy=False)
+    if lsb:
+        frames = numpy.frombuffer(REVERSED_BYTES, dtype=numpy.uint8)[frames]
+    # constants
+    header_valid = in_range.copy()
+    valid = in_range.copy()
+    for check in codec.checks:
+        ok = frames[:, check.byte] & check.mask == codec.template[check.byte] & check.mask
+        valid &= ok
+        if check.name == "header":
+            header_valid &= ok
+    # fields
+    result = {}
+    for field in codec.fields:
+        if field.decode is False:
+            continue
+        mapping = field.decode if isinstance(field.decode, dict) else {v: k for k, v in field.values.items()}
+        table = numpy.full(1 << field.width, None, dtype=object)
+        known = numpy.zeros(1 << field.width, dtype=bool)
+        for raw, value in mapping.items():
+            table[raw] = value
+            known[raw] = True
+        raw = frames[:, field.byte] >> field.bit & (1 << field.width) - 1
+        valid &= known[raw]
+        result[field.name] = table[raw]
+    checksum_ok = command_class.verify_batch(frames) & in_range
+    result["checksum"] = numpy.where(checksum_ok, "check_OK", "check_BAD").astype(object)
+    for column in result.values():
+        column[~valid] = None
+    result["header_valid"] = header_valid
+    result["valid"] = valid
+    result["checksum_ok"] = checksum_ok
+    return result
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Bounded LRU cache of encoded frames
+
+Caching is opt-in, by setting the encode_cache attribute of a command class:
+
+    MitsubishiCommand_W001CP.encode_cache = EncodeCache(maxsize=512)
+
+Frames are then keyed by the encoded parameters and the lsb flag (and, for SG14D, the 10-minute clock
+value) so a cached frame is always the one encode_bytes() would have built.
+"""
+
+import collections
+import threading
+
+
+class EncodeCache(object):
+    """thread-safe LRU cache with hit / miss / eviction counters"""
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive, not %s" % repr(maxsize))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        """return the frame cached for key, or None"""
+        with self._lock:
+            try:
+                frame = self._frames[key]
+            except (KeyError, TypeError):
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """drop all the cached frames and reset the counters"""
+        with self._lock:
+            self._frames.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._frames),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""hvac-ir command line tool, bulk decoding of captures and encoding of states
+
+Inputs are split in chunks which are processed by --jobs worker processes; results are written in input
+order, and the throughput of every chunk is reported on stderr.
+
+    hvac-ir decode --input-format bits captures.txt > frames.jsonl
+    hvac-ir decode --input-format mode2 --jobs 4 --output-format columns capture.mode2 -o frames.jsonl
+    hvac-ir encode --protocol SG14D --output-format hex states.jsonl
+
+decode input formats:
+- bits: one frame per line as 0/1 characters (each byte MSB first, or as sent if --lsb)
+- packed: frames of --protocol as consecutive bytes
+- mode2: LIRC mode2 text ("pulse N" / "space N" lines)
+- raw: alternating mark / space durations as native-endian 32 bits unsigned integers
+
+decode output formats:
+- jsonl: one JSON object per frame
+- columns: one JSON object per chunk, holding a list of values for every field (None where a frame lacks it)
+
+encode input is JSON lines, one state per line: {"protocol": "SG14D", "power": true, "temperature": 22}, the
+protocol key can be left out with --protocol. Packed output requires --protocol and rejects the states of
+other protocols, whose frames have another size.
+"""
+
+import argparse
+import array
+import collections
+import concurrent.futures
+import datetime
+import json
+import sys
+import time
+
+from . import registry
+from .codec import bytes_to_bitstring, dump_to_frame
+from .stream import decode_stream, read_binary, read_mode2
+
+
+def _model(command_class):
+    return command_class.__name__.rsplit("_", 1)[-1]
+
+
+def _frame_record(frame, command_class, lsb):
+    """return the record of a packed frame, decoded with command_class or with the registry if None"""
+    try:
+        if command_class is None:
+            command_class, result = registry.decode(frame, lsb)
+        else:
+            result = command_class.from_dump(frame, lsb)
+    except ValueError as exc:
+        return {"protocol": command_class and _model(command_class), "error": str(exc)}
+    record = {"protocol": _model(command_class)}
+    record.update(result)
+    return record
+
+
+def _decode_chunk(task):
+    """decode a chunk of input in a worker, return (records, seconds)"""
+    input_format, protocol, lsb, tolerance, data = task
+    started = time.perf_counter()
+    command_class = None if protocol is None else registry.get_protocol(protocol)
+    records = []
+    if input_format == "bits":
+        for line in data:
+            if len(line) % 8:
+                records.append({"protocol": None, "error": "length of %d bits is not whole bytes" % len(line)})
+                continue
+            try:
+                # every frame is packed MSB first before looking up the registry
+                frame = dump_to_frame(line, len(line) // 8, lsb)
+            except ValueError as exc:
+                records.append({"protocol": None, "error": str(exc)})
+                continue
+            records.append(_frame_record(frame, command_class, False))
+    elif input_format == "packed":
+        size = command_class.protocol_bytes
+        for offset in range(0, len(data), size):
+            records.append(_frame_record(data[offset : offset + size], command_class, lsb))
+    else:
+        classes = None if command_class is None else (command_class,)
+        for found_class, pulse_frame in decode_stream((data,), classes, tolerance):
+            record = {"protocol": _model(found_class)}
+            if pulse_frame.result is None:
+                record["error"] = pulse_frame.error
+            else:
+                record.update(pulse_frame.result)
+            records.append(record)
+    return records, time.perf_counter() - started
+
+
+def _encode_chunk(task):
+    """encode a chunk of JSON lines in a worker, return ([(output, error), ...], seconds)"""
+    protocol, lsb, time_of_day, output_format, lines = task
+    started = time.perf_counter()
+    # packed frames have no separator, they must all have the size of the frames of --protocol
+    packed_class = registry.get_protocol(protocol) if output_format == "packed" else None
+    outputs = []
+    for line in lines:
+        try:
+            state = json.loads(line)
+            command_class = registry.get_protocol(state.pop("protocol", protocol))
+            if packed_class is not None and command_class is not packed_class:
+                raise ValueError(
+                    "packed output holds %s frames only, not %s" % (_model(packed_class), _model(command_class))
+                )
+            command = command_class(**state)
+            options = {"time_of_day": time_of_day} if hasattr(command_class, "patch_timeofday") else {}
+            if output_format == "mode2":
+                train = command.encode_pulses(**options)
+                kinds = ("pulse", "space") * (len(train) // 2)
+                output = "".join("%s %d\n" % _ for _ in zip(kinds, train))
+            else:
+                frame = command.encode_bytes(lsb, **options)
+                if output_format == "packed":
+                    output = bytes(frame)
+                elif output_format == "hex":
+                    output = frame.hex() + "\n"
+                else:
+                    output = bytes_to_bitstring(frame) + "\n"
+        except (ValueError, TypeError, AttributeError) as exc:
+            outputs.append((None, str(exc)))
+            continue
+        outputs.append((output, None))
+    return outputs, time.perf_counter() - started
+
+
+def _ordered(function, tasks, jobs):
+    """yield function(task) for every task, in order, computed by jobs processes"""
+    if jobs <= 1:
+        for task in tasks:
+            yield function(task)
+        return
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        # bounded read-ahead, so memory does not depend on the size of the input
+        pending = collections.deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(function, task))
+                if len(pending) >= 2 * jobs:
+                    yield pending.popleft().result()
+        except ValueError:
+            # input error, the tasks read before it are still yielded
+            while pending:
+                yield pending.popleft().result()
+            raise
+        while pending:
+            yield pending.popleft().result()
+
+
+def _lines(fileobj, chunk_size):
+    """yield lists of chunk_size non-empty, non-comment lines"""
+    lines = []
+    for line in fileobj:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        lines.append(line)
+        if len(lines) == chunk_size:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def _packed(fileobj, frame_size, chunk_size):
+    """yield chunks of chunk_size frames, raise ValueError after the whole frames if the input ends with a
+    partial one
+    """
+    while True:
+        data = fileobj.read(frame_size * chunk_size)
+        if not data:
+            return
+        partial = len(data) % frame_size
+        if len(data) > partial:
+            yield data[: len(data) - partial]
+        if partial:
+            raise ValueError("input ends with a partial frame of %d bytes, frames are %d bytes" % (partial, frame_size))
+
+
+def _timings(chunks, chunk_size, threshold):
+    """merge chunks of durations into arrays of at least chunk_size durations, cut after spaces longer than
+    threshold so that no frame is split
+
+    Input without such spaces (noise, a wrong threshold) is cut anyway past 4 * chunk_size durations, at the
+    cost of the frame straddling the cut, so that memory stays bounded.
+    """
+    durations = array.array("I")
+    for chunk in chunks:
+        durations += chunk
+        if len(durations) < chunk_size:
+            continue
+        # spaces are at odd indexes, the next chunk must start with a mark
+        for index in range(len(durations) - 1 - len(durations) % 2, 0, -2):
+            if durations[index] > threshold:
+                yield durations[: index + 1]
+                durations = durations[index + 1 :]
+                break
+        else:
+            if len(durations) >= 4 * chunk_size:
+                index = len(durations) - len(durations) % 2
+                yield durations[:index]
+                durations = durations[index:]
+    if durations:
+        yield durations
+
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdin.buffer if "b" in mode else sys.stdin
+    return open(path, mode)
+
+
+def _report(number, count, kind, errors, seconds, checksums=None):
+    """write the statistics of a chunk to stderr"""
+    report = "chunk %d: %d %s, %d errors" % (number, count, kind, errors)
+    if checksums is not None:
+        report += ", %d bad checksums" % checksums
+    rate = count / seconds if seconds else 0.0
+    sys.stderr.write("%s, %.0f %s/s\n" % (report, rate, kind))
+
+
+def _columns(records):
+    """return the records of a chunk as {field: [value of every record, ...]}, None for missing fields"""
+    columns = collections.OrderedDict()
+    for record in records:
+        for name in record:
+            columns.setdefault(name, None)
+    for name in columns:
+        columns[name] = [_.get(name) for _ in records]
+    return columns
+
+
+def decode_main(args):
+    command_class = None if args.protocol is None else registry.get_protocol(args.protocol)
+    protocol = None if command_class is None else command_class.__name__
+    fileobj = _open(args.input, "r" if args.input_format in ("bits", "mode2") else "rb")
+    if args.input_format == "bits":
+        chunks = _lines(fileobj, args.chunk_size)
+    elif args.input_format == "packed":
+        if command_class is None:
+            raise SystemExit("packed input requires --protocol")
+        chunks = _packed(fileobj, command_class.protocol_bytes, args.chunk_size)
+    else:
+        classes = registry.protocols() if command_class is None else (command_class,)
+        # no space within a frame is longer than this
+        threshold = (1 + args.tolerance) * max(
+            max(_.pyslinger_protocol_config[name] for name in ("leading_gap_duration", "one_gap_duration"))
+            for _ in classes
+        )
+        reader = read_mode2 if args.input_format == "mode2" else read_binary
+        # chunk_size counts frames, each frame is a few hundred durations
+        chunks = _timings(reader(fileobj), args.chunk_size * 300, threshold)
+    tasks = ((args.input_format, protocol, args.lsb, args.tolerance, _) for _ in chunks)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    index = 0
+    # chunks read before an input error are still written
+    error = None
+    try:
+        for number, (records, seconds) in enumerate(_ordered(_decode_chunk, tasks, args.jobs)):
+            errors = checksums = 0
+            for record in records:
+                record["index"] = index
+                index += 1
+                if "error" in record:
+                    errors += 1
+                elif record.get("checksum", "check_OK") != "check_OK":
+                    checksums += 1
+                if args.output_format == "jsonl":
+                    output.write(json.dumps(record) + "\n")
+            if args.output_format == "columns" and records:
+                output.write(json.dumps(_columns(records)) + "\n")
+            output.flush()
+            _report(number, len(records), "frames", errors, seconds, checksums)
+    except ValueError as exc:
+        error = "%s: %s" % ("stdin" if args.input == "-" else args.input, exc)
+    if output is not sys.stdout:
+        output.close()
+    if error is not None:
+        raise SystemExit(error)
+
+
+def encode_main(args):
+    if args.protocol is not None:
+        registry.get_protocol(args.protocol)
+    elif args.output_format == "packed":
+        raise SystemExit("packed output requires --protocol")
+    time_of_day = None
+    if args.time is not None:
+        time_of_day = datetime.datetime.strptime(args.time, "%H:%M").time()
+    fileobj = _open(args.input, "r")
+    tasks = ((args.protocol, args.lsb, time_of_day, args.output_format, _) for _ in _lines(fileobj, args.chunk_size))
+    binary = args.output_format == "packed"
+    if args.output == "-":
+        output = sys.stdout.buffer if binary else sys.stdout
+    else:
+        output = open(args.output, "wb" if binary else "w")
+    line = 0
+    for number, (outputs, seconds) in enumerate(_ordered(_encode_chunk, tasks, args.jobs)):
+        errors = 0
+        for data, error in outputs:
+            line += 1
+            if error is not None:
+                errors += 1
+                sys.stderr.write("state %d: %s\n" % (line, error))
+            else:
+                output.write(data)
+        output.flush()
+        _report(number, len(outputs), "states", errors, seconds)
+    if args.output != "-":
+        output.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="hvac-ir", description="bulk decoding and encoding of HVAC IR frames")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    common.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    common.add_argument("-p", "--protocol", help="command class or model name, eg. W001CP")
+    common.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    common.add_argument("--chunk-size", type=int, default=10000, help="frames per chunk")
+    common.add_argument("--lsb", action="store_true", help="bytes are LSB first, as sent on the wire")
+
+    decode = subparsers.add_parser("decode", parents=[common], help="decode captured frames to JSON")
+    decode.add_argument("-f", "--input-format", choices=("bits", "packed", "mode2", "raw"), default="bits")
+    decode.add_argument("--output-format", choices=("jsonl", "columns"), default="jsonl")
+    decode.add_argument("--tolerance", type=float, default=0.25, help="tolerance of mode2 and raw durations")
+    decode.set_defaults(function=decode_main)
+
+    encode = subparsers.add_parser("encode", parents=[common], help="encode JSON lines states to frames")
+    encode.add_argument("--output-format", choices=("bits", "hex", "packed", "mode2"), default="bits")
+    encode.add_argument("--time", help="time of day of the frames with a clock, as HH:MM (default: now)")
+    encode.set_defaults(function=encode_main)
+
+    args = parser.parse_args(argv)
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs and --chunk-size must be positive")
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Precomputed codebooks holding the frame of every valid state of a protocol
+
+A codebook file contains the frame (MSB first) of every combination of protocol_parameters, in the order
+given by itertools.product(), followed by an open addressing hash table from frame to state index. Clocks
+are left out (set to midnight) so that SG14D frames depend on the state only.
+
+Codebook memory-maps such a file: worker processes opening the same codebook share a single read-only copy
+of it, and encodes and decodes take a single index computation.
+
+    python3 -m hvac_ir.codebook W001CP w001cp.codebook
+"""
+
+import argparse
+import datetime
+import itertools
+import mmap
+import struct
+import zlib
+
+from .codec import REVERSED_BYTES, value_key
+from .registry import get_protocol
+
+_MAGIC = b"HVACIRCB"
+_VERSION = 1
+# magic, version, frame size, protocol (command class name), number of frames, number of hash slots
+_HEADER = struct.Struct("<8sHH32sII")
+_SLOT = struct.Struct("<I")
+_EMPTY = 0xFFFFFFFF
+_MIDNIGHT = datetime.time()
+
+
+def _strip_clock(command_class, frame):
+    if hasattr(command_class, "patch_timeofday"):
+        frame = command_class.patch_timeofday(bytearray(frame), _MIDNIGHT, lsb=False)
+    return bytes(frame)
+
+
+def write_codebook(command_class, path):
+    """write the codebook of command_class to path, return the number of frames"""
+    names = tuple(command_class.protocol_parameters)
+    frame_size = command_class.protocol_bytes
+    frames = bytearray()
+    for state in itertools.product(*(command_class.protocol_parameters[_] for _ in names)):
+        frame = command_class(**dict(zip(names, state))).encode_bytes(lsb=False)
+        frames += _strip_clock(command_class, frame)
+    count = len(frames) // frame_size
+    # hash table of frame indexes, at most half full
+    slots = 1 << (2 * count - 1).bit_length()
+    table = bytearray(b"\xff" * _SLOT.size * slots)
+    for index in range(count):
+        slot = zlib.crc32(frames[index * frame_size : (index + 1) * frame_size]) & (slots - 1)
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[0] != _EMPTY:
+            slot = (slot + 1) & (slots - 1)
+        _SLOT.pack_into(table, slot * _SLOT.size, index)
+    with open(path, "wb") as fh:
+        fh.write(_HEADER.pack(_MAGIC, _VERSION, frame_size, command_class.__name__.encode(), count, slots))
+        fh.write(frames)
+        fh.write(table)
+    return count
+
+
+class Codebook(object):
+    """read-only, memory-mapped codebook written by write_codebook()
+
+    States are tuples of values in the order of command_class.protocol_parameters (see parameters).
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.frame_size, protocol, self.count, self._slots = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("%s is not a version %d codebook" % (path, _VERSION))
+        self.command_class = get_protocol(protocol.rstrip(b"\0").decode())
+        self.parameters = tuple(self.command_class.protocol_parameters)
+        self._values = tuple(self.command_class.protocol_parameters[_] for _ in self.parameters)
+        # position of every value of every parameter and weight of every parameter in the frame index
+        self._positions = tuple({value_key(v): i for i, v in enumerate(values)} for values in self._values)
+        strides = [1]
+        for values in reversed(self._values[1:]):
+            strides.insert(0, strides[0] * len(values))
+        self._strides = tuple(strides)
+        self._frames_offset = _HEADER.size
+        self._table_offset = _HEADER.size + self.count * self.frame_size
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def index(self, state):
+        """return the index of a state tuple, raise ValueError if it is not valid"""
+        if len(state) != len(self.parameters):
+            raise ValueError("state has %d values instead of %d" % (len(state), len(self.parameters)))
+        index = 0
+        for name, positions, stride, value in zip(self.parameters, self._positions, self._strides, state):
+            try:
+                index += positions[value_key(value)] * stride
+            except (KeyError, TypeError):
+                raise ValueError("wrong %s value %s" % (name, repr(value))) from None
+        return index
+
+    def state(self, index):
+        """return the state tuple at index"""
+        if not 0 <= index < self.count:
+            raise IndexError("codebook index %d out of range" % index)
+        state = []
+        for values, stride in zip(self._values, self._strides):
+            position, index = divmod(index, stride)
+            state.append(values[position])
+        return tuple(state)
+
+    def encode(self, state, lsb=True, time_of_day=None):
+        """return the frame of a state tuple, with its clock set to time_of_day (default: now) if it has one"""
+        offset = self._frames_offset + self.index(state) * self.frame_size
+        frame = self._mmap[offset : offset + self.frame_size]
+        if hasattr(self.command_class, "patch_timeofday"):
+            if time_of_day is None:
+                time_of_day = datetime.datetime.now()
+            frame = bytes(self.command_class.patch_timeofday(bytearray(frame), time_of_day, lsb=False))
+        if lsb:
+            frame = frame.translate(REVERSED_BYTES)
+        return frame
+
+    def decode(self, frame, lsb=False):
+        """return the state tuple of a packed frame, raise ValueError if it is not in the codebook"""
+        frame = bytes(frame)
+        if len(frame) != self.frame_size:
+            raise ValueError(
+                "length of %d bytes does not match codebook length %d bytes" % (len(frame), self.frame_size)
+            )
+        if lsb:
+            frame = frame.translate(REVERSED_BYTES)
+        frame = _strip_clock(self.command_class, frame)
+        slot = zlib.crc32(frame) & (self._slots - 1)
+        while True:
+            index = _SLOT.unpack_from(self._mmap, self._table_offset + slot * _SLOT.size)[0]
+            if index == _EMPTY:
+                raise ValueError("frame not found in codebook")
+            offset = self._frames_offset + index * self.frame_size
+            if self._mmap[offset : offset + self.frame_size] == frame:
+                return self.state(index)
+            slot = (slot + 1) & (self._slots - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="write the codebook of every frame of a protocol")
+    parser.add_argument("protocol", help="command class or model name, eg. W001CP")
+    parser.add_argument("path", help="codebook file to write")
+    args = parser.parse_args()
+    count = write_codebook(get_protocol(args.protocol), args.path)
+    print("%d frames written to %s" % (count, args.path))
+
+
+if __name__ == "__main__":
+    main()
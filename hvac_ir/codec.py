@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Table driven encoding and decoding of IR frames
+
+A protocol is described by a frame template holding all the constant bits, a table of fields and a table of
+checks. Each Field maps the values of a command attribute to the raw bits found at a given position of the
+frame, each Check marks bits that must match the template when decoding. FrameCodec compiles those tables
+once into dict and tuple lookups, so every field costs a single lookup in both directions.
+
+Byte offsets count from the start of the frame and bit offsets from the least significant bit of the byte,
+with every byte MSB first (see REVERSED_BYTES for the LSB first order used on the wire).
+"""
+
+import collections
+
+# every byte value with its bits in reverse order, to switch between MSB and LSB first
+REVERSED_BYTES = bytes(int("{0:08b}".format(_)[::-1], 2) for _ in range(256))
+# every byte value as a string of 8 bits, MSB first
+BITSTRINGS = tuple("{0:08b}".format(_) for _ in range(256))
+
+# name: command attribute (when encoding) and result key (when decoding)
+# values: {attribute value: raw bits}
+# encode: False for fields which are only decoded
+# decode: True to decode with the inverse of values, False to skip, or a {raw bits: value} dict
+Field = collections.namedtuple("Field", "name byte bit width values encode decode", defaults=(True, True))
+Check = collections.namedtuple("Check", "name byte mask")
+
+_INVALID = object()
+
+
+class FieldValueError(ValueError):
+    """a field or a check of a frame (or an attribute of a command) is invalid, name is the Field or Check name"""
+
+    def __init__(self, message, name=None):
+        self.name = name
+        super().__init__(message)
+
+
+def bitstring_to_bytes(bitstring):
+    return bytes(int(bitstring[_ : _ + 8], 2) for _ in range(0, len(bitstring), 8))
+
+
+def bytes_to_bitstring(frame):
+    return "".join([BITSTRINGS[_] for _ in frame])
+
+
+def value_key(value):
+    """return the key of value in FrameCodec lookup tables"""
+    # bool is a subclass of int but True / False must not be mistaken for 1 / 0
+    return (bool, value) if value.__class__ is bool else value
+
+
+def dump_to_frame(binary_dump, protocol_bytes, lsb=False):
+    """return binary_dump as a sequence of protocol_bytes byte values, MSB first
+
+    binary_dump can be a packed frame (bytes, bytearray or memoryview) or any iterable of bits (0/1 integers
+    or characters), as sent on the wire if lsb is True or with each byte MSB first otherwise
+    """
+    if isinstance(binary_dump, (bytes, bytearray, memoryview)):
+        frame = binary_dump
+        if isinstance(frame, memoryview) and frame.format != "B":
+            frame = frame.cast("B")
+        if len(frame) != protocol_bytes:
+            raise ValueError(
+                "length of %d bytes does not match protocol length %d bytes" % (len(frame), protocol_bytes)
+            )
+        if lsb:
+            frame = bytes(frame).translate(REVERSED_BYTES)
+        return frame
+    # pack an iterable of bits
+    value = 0
+    length = 0
+    for bit in binary_dump:
+        bit = int(bit)
+        if bit >> 1:
+            raise ValueError("wrong bit value %d in dump" % bit)
+        value = value << 1 | bit
+        length += 1
+    if length != protocol_bytes * 8:
+        raise ValueError("length of %d bits does not match protocol length %d bits" % (length, protocol_bytes * 8))
+    frame = value.to_bytes(protocol_bytes, "big")
+    if lsb:
+        frame = frame.translate(REVERSED_BYTES)
+    return frame
+
+
+class FrameCodec(object):
+    """compiled form of a protocol template, fields and checks"""
+
+    def __init__(self, template, fields, checks=(), parameters=None):
+        self.template = bytes(template)
+        self.fields = tuple(fields)
+        self.checks = tuple(checks)
+        # every encoded field must accept exactly the values listed in the protocol parameters
+        if parameters is not None:
+            for field in self.fields:
+                if field.encode and field.name in parameters:
+                    if set(map(value_key, field.values)) != set(map(value_key, parameters[field.name])):
+                        raise ValueError("field %s does not match protocol parameters" % field.name)
+        # encoding: {byte offset: ((name, {value key: shifted raw bits}), ...)}
+        encoders = collections.OrderedDict()
+        for field in self.fields:
+            if not field.encode:
+                continue
+            if field.bit + field.width > 8:
+                raise ValueError("field %s does not fit in byte %d" % (field.name, field.byte))
+            table = {value_key(value): raw << field.bit for value, raw in field.values.items()}
+            encoders.setdefault(field.byte, []).append((field.name, table))
+        self._encoders = tuple((byte, tuple(encs)) for byte, encs in encoders.items())
+        self._byte_encoders = dict(self._encoders)
+        # names of the encoded attributes, in field order, and offsets of the bytes holding each of them
+        self.names = tuple(collections.OrderedDict.fromkeys(f.name for f in self.fields if f.encode))
+        self.name_bytes = {
+            name: tuple(sorted({f.byte for f in self.fields if f.encode and f.name == name})) for name in self.names
+        }
+        # decoding: ((name, byte offset, shift, mask, (value of every raw bits combination, ...)), ...)
+        decoders = []
+        for field in self.fields:
+            if field.decode is False:
+                continue
+            mapping = field.decode if isinstance(field.decode, dict) else {v: k for k, v in field.values.items()}
+            table = [_INVALID] * (1 << field.width)
+            for raw, value in mapping.items():
+                table[raw] = value
+            decoders.append((field.name, field.byte, field.bit, (1 << field.width) - 1, tuple(table)))
+        self._decoders = tuple(decoders)
+        self.decoded_names = tuple(_[0] for _ in decoders)
+        # checking: ((name, byte offset, mask, expected bits), ...)
+        self._checks = tuple(
+            (check.name, check.byte, check.mask, self.template[check.byte] & check.mask) for check in self.checks
+        )
+        # {byte offset: validity of every byte value}, for the bytes holding checks or decoded fields
+        self._valid_bytes = {}
+        for byte in {_[1] for _ in self._checks} | {_[1] for _ in self._decoders}:
+            self._valid_bytes[byte] = bytes(
+                all(value & mask == expected for _, offset, mask, expected in self._checks if offset == byte)
+                and all(
+                    table[value >> shift & mask] is not _INVALID
+                    for _, offset, shift, mask, table in self._decoders
+                    if offset == byte
+                )
+                for value in range(256)
+            )
+
+    @staticmethod
+    def _lookup(command, name, table):
+        value = getattr(command, name)
+        try:
+            return table[value_key(value)]
+        except (KeyError, TypeError):
+            raise FieldValueError("wrong %s value %s" % (name, repr(value)), name) from None
+
+    def encode_key(self, command):
+        """return a hashable tuple of the encoded attributes of command, eg. to cache its frames"""
+        return tuple([value_key(getattr(command, name)) for name in self.names])
+
+    def encode(self, command):
+        """return a bytearray with the template and all the fields of command (MSB first)"""
+        frame = bytearray(self.template)
+        for byte, encoders in self._encoders:
+            value = frame[byte]
+            for name, table in encoders:
+                value |= self._lookup(command, name, table)
+            frame[byte] = value
+        return frame
+
+    def encode_byte(self, command, byte):
+        """return the value of a single byte of the frame (MSB first)"""
+        value = self.template[byte]
+        for name, table in self._byte_encoders.get(byte, ()):
+            value |= self._lookup(command, name, table)
+        return value
+
+    def valid_byte(self, byte, value):
+        """return True if value (MSB first) passes the checks and decodes the fields of byte"""
+        table = self._valid_bytes.get(byte)
+        return table is None or table[value] == 1
+
+    def decode_values(self, frame):
+        """return a list of the decoded fields of frame (MSB first), in decoded_names order
+
+        Raise FieldValueError (a ValueError) naming the first invalid check or field if the frame is invalid.
+        """
+        for name, byte, mask, expected in self._checks:
+            if frame[byte] & mask != expected:
+                raise FieldValueError("wrong %s: %s" % (name, BITSTRINGS[frame[byte]]), name)
+        values = []
+        for name, byte, shift, mask, table in self._decoders:
+            value = table[frame[byte] >> shift & mask]
+            if value is _INVALID:
+                raise FieldValueError("wrong %s: %s" % (name, BITSTRINGS[frame[byte]]), name)
+            values.append(value)
+        return values
+
+    def decode(self, frame):
+        """return a dict with all the decoded fields of frame (MSB first), raise ValueError if it is invalid"""
+        return dict(zip(self.decoded_names, self.decode_values(frame)))
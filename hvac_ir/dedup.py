@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Decoding of packed frames with detection of repeats
+
+Protocols send every frame more than once (protocol_repeats) and remotes often resend the same state: such
+frames are byte for byte identical, so their decoded result is cached, keyed by the packed frame. A frame
+seen again within window seconds of its previous copy is flagged as a repeat rather than a new event.
+
+    decoder = DedupDecoder(window=1.0)
+    for command_class, frame in decode_stream(read_mode2(fh)):
+        decoded = decoder.decode(frame.frame)
+        if not decoded.repeat:
+            publish(decoded.result)
+"""
+
+import collections
+import threading
+import time
+
+from .registry import decode
+
+# command_class: command class of the frame
+# result: from_dump() dict, a new copy on every call
+# repeat: True if the same frame was decoded less than window seconds before
+DecodedFrame = collections.namedtuple("DecodedFrame", "command_class result repeat")
+
+
+class DedupDecoder(object):
+    """thread-safe decoder of packed frames (see registry.decode()) with a bounded LRU cache of results
+
+    Frames are MSB first, or as sent on the wire if lsb is True (eg. PulseFrame.frame). clock must return
+    seconds.
+    """
+
+    def __init__(self, window=1.0, maxsize=256, lsb=False, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive, not %s" % repr(maxsize))
+        self.window = window
+        self.maxsize = maxsize
+        self.lsb = lsb
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.repeats = 0
+        self.evictions = 0
+        # {frame bytes: [command class, result, time last seen]}
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def decode(self, frame, now=None):
+        """return a DecodedFrame for a packed frame, raise ValueError if it cannot be decoded
+
+        now is the time the frame was received, default: clock().
+        """
+        key = bytes(frame)
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                repeat = now - entry[2] <= self.window
+                if repeat:
+                    self.repeats += 1
+                entry[2] = now
+                return DecodedFrame(entry[0], dict(entry[1]), repeat)
+            self.misses += 1
+        # decode out of the lock, invalid frames are not cached
+        command_class, result = decode(key, self.lsb)
+        with self._lock:
+            self._results[key] = [command_class, result, now]
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+        return DecodedFrame(command_class, dict(result), False)
+
+    def clear(self):
+        """drop all the cached results and reset the counters"""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.repeats = self.evictions = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "repeats": self.repeats,
+            "evictions": self.evictions,
+            "size": len(self._results),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Desired and last sent states of a fleet of units of the same command class
+
+States are stored as columns, one bytearray per parameter of protocol_parameters holding the position of
+the value of every unit in the list of valid values, so comparing the desired and the sent states of
+thousands of units takes a few vectorized comparisons (numpy) or a few tight loops (without numpy). Only
+the units whose desired state was never sent, or differs from the sent one, are encoded.
+
+    fleet = Fleet(MitsubishiCommand_SG14D)
+    fleet.set("unit 1", power=True, temperature=22)
+    units, frames = fleet.encode_changed(batch=True)
+    ...  # transmit the frames
+    fleet.mark_sent(units)
+"""
+
+import datetime
+import inspect
+
+from .batch import _require_numpy, encode_batch
+from .codec import value_key
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+# position of a value never sent
+_UNSENT = 0xFF
+
+
+class Fleet(object):
+    """desired and last sent states of units (any hashable) of command_class, in columns (see module)"""
+
+    def __init__(self, command_class, units=()):
+        self.command_class = command_class
+        self.parameters = tuple(command_class.protocol_parameters)
+        self._values = tuple(command_class.protocol_parameters[_] for _ in self.parameters)
+        self._positions = tuple({value_key(v): i for i, v in enumerate(values)} for values in self._values)
+        defaults = inspect.signature(command_class).parameters
+        self._defaults = tuple(self._position(i, defaults[_].default) for i, _ in enumerate(self.parameters))
+        self._has_clock = hasattr(command_class, "timeofday_value")
+        self.units = []
+        self._rows = {}
+        self._desired = tuple(bytearray() for _ in self.parameters)
+        self._sent = tuple(bytearray() for _ in self.parameters)
+        # clock (count of 10 minutes intervals from midnight) of the last frame sent to each unit
+        self._sent_clock = bytearray()
+        for unit in units:
+            self.add(unit)
+
+    def __len__(self):
+        return len(self.units)
+
+    def __contains__(self, unit):
+        return unit in self._rows
+
+    def _position(self, index, value):
+        try:
+            return self._positions[index][value_key(value)]
+        except (KeyError, TypeError):
+            raise ValueError("wrong %s value %s" % (self.parameters[index], repr(value))) from None
+
+    def add(self, unit):
+        """add unit with the default state of the command class, never sent, return its row"""
+        if unit in self._rows:
+            return self._rows[unit]
+        row = self._rows[unit] = len(self.units)
+        self.units.append(unit)
+        for column, default in zip(self._desired, self._defaults):
+            column.append(default)
+        for column in self._sent:
+            column.append(_UNSENT)
+        self._sent_clock.append(_UNSENT)
+        return row
+
+    def set(self, unit, command=None, **values):
+        """set the desired state of unit (added if needed) from the attributes of command and / or values"""
+        row = self.add(unit)
+        unknown = set(values) - set(self.parameters)
+        if unknown:
+            raise ValueError("unknown parameters: %s" % ", ".join(sorted(unknown)))
+        positions = []
+        for index, name in enumerate(self.parameters):
+            if name in values:
+                positions.append(self._position(index, values[name]))
+            elif command is not None:
+                positions.append(self._position(index, getattr(command, name)))
+            else:
+                positions.append(self._desired[index][row])
+        # only store valid states
+        for column, position in zip(self._desired, positions):
+            column[row] = position
+
+    def desired(self, unit):
+        """return a {parameter: value} dict of the desired state of unit"""
+        return self._state(self._desired, self._rows[unit])
+
+    def sent(self, unit):
+        """return a {parameter: value} dict of the last state sent to unit, None if it was never sent"""
+        row = self._rows[unit]
+        if self._sent[0][row] == _UNSENT:
+            return None
+        return self._state(self._sent, row)
+
+    def _state(self, columns, row):
+        return {name: values[column[row]] for name, values, column in zip(self.parameters, self._values, columns)}
+
+    def _changed_rows(self):
+        if numpy is not None:
+            changed = numpy.zeros(len(self.units), dtype=bool)
+            for desired, sent in zip(self._desired, self._sent):
+                changed |= numpy.frombuffer(desired, dtype=numpy.uint8) != numpy.frombuffer(sent, dtype=numpy.uint8)
+            return numpy.flatnonzero(changed).tolist()
+        changed = set()
+        for desired, sent in zip(self._desired, self._sent):
+            if desired != sent:
+                changed.update(row for row, (a, b) in enumerate(zip(desired, sent)) if a != b)
+        return sorted(changed)
+
+    def _stale_rows(self, time_of_day):
+        if not self._has_clock:
+            return []
+        if time_of_day is None:
+            time_of_day = datetime.datetime.now()
+        clock = self.command_class.timeofday_value(time_of_day)
+        if numpy is not None:
+            sent_clock = numpy.frombuffer(self._sent_clock, dtype=numpy.uint8)
+            return numpy.flatnonzero((sent_clock != clock) & (sent_clock != _UNSENT)).tolist()
+        return [row for row, sent in enumerate(self._sent_clock) if sent != clock and sent != _UNSENT]
+
+    def changed(self):
+        """return the units whose desired state was never sent or differs from the last sent one"""
+        return [self.units[_] for _ in self._changed_rows()]
+
+    def stale(self, time_of_day=None):
+        """return the units whose last frame carried another clock than time_of_day (default: now)
+
+        Always empty for command classes without a clock (eg. W001CP).
+        """
+        return [self.units[_] for _ in self._stale_rows(time_of_day)]
+
+    def encode_changed(self, lsb=True, time_of_day=None, stale=False, batch=False):
+        """encode the desired state of the changed units (and of the stale ones if stale is True)
+
+        Return a list of (unit, frame) tuples, or the list of units and an (N, protocol_bytes) numpy array of
+        frames (see encode_batch()) if batch is True. Frames carry time_of_day (default: now) if they have a
+        clock.
+        """
+        if self._has_clock and time_of_day is None:
+            time_of_day = datetime.datetime.now()
+        rows = self._changed_rows()
+        if stale:
+            rows = sorted(set(rows).union(self._stale_rows(time_of_day)))
+        units = [self.units[_] for _ in rows]
+        if batch:
+            _require_numpy()
+            columns = {}
+            for name, values, column in zip(self.parameters, self._values, self._desired):
+                positions = numpy.frombuffer(column, dtype=numpy.uint8)[rows]
+                columns[name] = numpy.array(values, dtype=object)[positions]
+            return units, encode_batch(self.command_class, lsb=lsb, time_of_day=time_of_day, **columns)
+        options = {"time_of_day": time_of_day} if self._has_clock else {}
+        frames = []
+        for unit, row in zip(units, rows):
+            command = self.command_class(**self._state(self._desired, row))
+            frames.append((unit, command.encode_bytes(lsb, **options)))
+        return frames
+
+    def mark_sent(self, units, time_of_day=None):
+        """record the desired state of units as sent, with a clock of time_of_day (default: now)"""
+        clock = _UNSENT
+        if self._has_clock:
+            if time_of_day is None:
+                time_of_day = datetime.datetime.now()
+            clock = self.command_class.timeofday_value(time_of_day)
+        for unit in units:
+            row = self._rows[unit]
+            for desired, sent in zip(self._desired, self._sent):
+                sent[row] = desired[row]
+            self._sent_clock[row] = clock
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Transmitter formats: Broadlink packets and Pronto hex codes
+
+Both formats are built straight from the frame bytes, like pulse trains (see hvac_ir.pulses): the encoding
+of the durations of every byte value is computed once per command class, so a code is assembled by joining
+17 or 18 cached buffers. broadlink_from_pulses() and pronto_from_pulses() convert any pulse train duration
+by duration and give the same results.
+
+    packet = MitsubishiCommand_W001CP(power=True).encode_broadlink()
+    pronto = MitsubishiCommand_W001CP(power=True).encode_pronto()
+"""
+
+import struct
+
+from .codec import BITSTRINGS
+
+# Broadlink durations are in ticks of 8192 / 269 microseconds (about 30.45, close to the 2^-15 seconds = 30.52
+# microseconds of the device), rounded down, as in the usual LIRC / Pronto to Broadlink converters; beware that
+# python-broadlink converts with 32.84 microseconds ticks, which gives different bytes
+_BROADLINK_IR = 0x26
+_BROADLINK_END = b"\x0d\x05"
+# Pronto frequency words are in units of 0.241246 microseconds
+_PRONTO_UNIT = 0.241246
+
+# {command class: (leading, (every byte value, ...), trailing)} for each format
+_BROADLINK_TEMPLATES = {}
+_PRONTO_TEMPLATES = {}
+
+
+def _broadlink_duration(duration):
+    """return a duration (microseconds) in Broadlink ticks, values above 255 take 3 bytes"""
+    ticks = duration * 269 // 8192
+    if ticks > 255:
+        return b"\x00" + struct.pack(">H", ticks)
+    return struct.pack(">B", ticks)
+
+
+def _broadlink_packet(data, repeat):
+    packet = bytearray((_BROADLINK_IR, repeat)) + struct.pack("<H", len(data)) + data + _BROADLINK_END
+    # whole packets (plus the 4 bytes command header) are encrypted in 16 bytes blocks
+    remainder = (len(packet) + 4) % 16
+    if remainder:
+        packet += bytes(16 - remainder)
+    return bytes(packet)
+
+
+def broadlink_from_pulses(train, repeat=0):
+    """return the Broadlink packet of a pulse train, sent 1 + repeat times by the device"""
+    return _broadlink_packet(b"".join([_broadlink_duration(_) for _ in train]), repeat)
+
+
+def _pronto_word(frequency):
+    return int(round(1000000 / (frequency * _PRONTO_UNIT)))
+
+
+def _pronto_duration(duration, word):
+    """return a duration in cycles of the Pronto carrier, as a 4 digits hex word"""
+    return "%04X" % int(round(duration / (word * _PRONTO_UNIT)))
+
+
+def pronto_from_pulses(train, frequency):
+    """return the Pronto hex code of a pulse train, as a single burst sequence sent once"""
+    word = _pronto_word(frequency)
+    words = ["0000", "%04X" % word, "%04X" % (len(train) // 2), "0000"]
+    words.extend(_pronto_duration(_, word) for _ in train)
+    return " ".join(words)
+
+
+def _templates(command_class, cache, encode_duration):
+    try:
+        return cache[command_class]
+    except KeyError:
+        pass
+    config = command_class.pyslinger_protocol_config
+    bit_durations = {
+        "0": (config["zero_pulse_duration"], config["zero_gap_duration"]),
+        "1": (config["one_pulse_duration"], config["one_gap_duration"]),
+    }
+    templates = (
+        encode_duration((config["leading_pulse_duration"], config["leading_gap_duration"])),
+        tuple(encode_duration([_ for bit in BITSTRINGS[byte] for _ in bit_durations[bit]]) for byte in range(256)),
+        encode_duration((config["trailing_pulse_duration"], config["trailing_gap_duration"])),
+    )
+    cache[command_class] = templates
+    return templates
+
+
+def broadlink_packet(command_class, frame, repeat=0):
+    """return the Broadlink packet of a frame in wire order (eg. encode_bytes(lsb=True)), with protocol repeats
+
+    The packet is sent 1 + repeat times by the device.
+    """
+    leading, byte_templates, trailing = _templates(
+        command_class, _BROADLINK_TEMPLATES, lambda durations: b"".join([_broadlink_duration(_) for _ in durations])
+    )
+    data = b"".join([leading] + [byte_templates[_] for _ in frame] + [trailing]) * command_class.protocol_repeats
+    return _broadlink_packet(data, repeat)
+
+
+def pronto_code(command_class, frame):
+    """return the Pronto hex code of a frame in wire order (eg. encode_bytes(lsb=True)), with protocol repeats"""
+    word = _pronto_word(command_class.pyslinger_protocol_config["frequency"])
+    leading, byte_templates, trailing = _templates(
+        command_class, _PRONTO_TEMPLATES, lambda durations: " ".join([_pronto_duration(_, word) for _ in durations])
+    )
+    burst = " ".join([leading] + [byte_templates[_] for _ in frame] + [trailing])
+    pairs = (len(frame) * 8 + 2) * command_class.protocol_repeats
+    return " ".join(["0000", "%04X" % word, "%04X" % pairs, "0000"] + [burst] * command_class.protocol_repeats)
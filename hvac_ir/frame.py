@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Encoded frames updated in place
+
+Both classes keep the frame of a command in a bytearray, in the bit order given by lsb, and patch it
+through the patch_byte() / patch_timeofday() class methods of the command class, which keep the checksum
+up to date. The bytearray returned by render() is reused and overwritten by the following render() calls.
+"""
+
+import copy
+import datetime
+
+
+class FrameTemplate(object):
+    """frame of a command built once, only the clock (if any, eg. SG14D) is updated on each render()"""
+
+    def __init__(self, command, lsb=True):
+        self.command_class = type(command)
+        self.lsb = lsb
+        self.clock = getattr(command, "clock", None) or datetime.datetime.now
+        self.frame = bytearray(command.encode_bytes(lsb))
+        self._patch_timeofday = getattr(self.command_class, "patch_timeofday", None)
+
+    def render(self, time_of_day=None):
+        """return the frame with its clock set to time_of_day (default: the command clock)"""
+        if self._patch_timeofday is not None:
+            self._patch_timeofday(self.frame, self.clock() if time_of_day is None else time_of_day, self.lsb)
+        return self.frame
+
+
+class MutableFrame(FrameTemplate):
+    """frame of a command re-encoded incrementally
+
+    Setting an encoded attribute (eg. frame.temperature = 25) marks the bytes holding it as dirty: render()
+    rewrites only those bytes and updates the checksum by difference. The command is copied, so the one
+    passed to the constructor is never modified.
+    """
+
+    _field_bytes = {}
+
+    def __init__(self, command, lsb=True):
+        command = copy.copy(command)
+        super().__init__(command, lsb)
+        self._field_bytes = self.command_class.protocol_codec.name_bytes
+        self.command = command
+        self.dirty = set()
+
+    def __getattr__(self, name):
+        if name in self._field_bytes:
+            return getattr(self.command, name)
+        raise AttributeError("%s object has no attribute %s" % (type(self).__name__, repr(name)))
+
+    def __setattr__(self, name, value):
+        if name in self._field_bytes:
+            setattr(self.command, name, value)
+            self.dirty.update(self._field_bytes[name])
+        else:
+            super().__setattr__(name, value)
+
+    def render(self, time_of_day=None):
+        """re-encode the dirty bytes, return the frame with its clock set to time_of_day (if it has one)"""
+        if self.dirty:
+            codec = self.command_class.protocol_codec
+            # encode everything before patching, so a wrong value leaves the frame untouched
+            values = [(byte, codec.encode_byte(self.command, byte)) for byte in sorted(self.dirty)]
+            for byte, value in values:
+                self.command_class.patch_byte(self.frame, byte, value, self.lsb)
+            self.dirty.clear()
+        return super().render(time_of_day)
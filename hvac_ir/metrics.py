@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Encode and decode counters and latency histograms, per protocol
+
+Collection is off by default and costs nothing then: enable() wraps encode_bytes() and from_dump() of the
+command classes (every encode, encode_pulses(), encode_broadlink()... goes through encode_bytes()) and
+disable() puts the original methods back.
+
+    metrics.enable()
+    ...
+    print(metrics.snapshot()["W001CP"]["checksum_failures"])
+    metrics.start_http_server(9101)    # Prometheus text format on http://127.0.0.1:9101/metrics
+
+Counters of every protocol:
+- encodes / decodes: calls of encode_bytes() / from_dump(), failed ones included
+- checksum_failures: frames decoded with a checksum other than "check_OK"
+- header_mismatches: frames rejected because of their header
+- invalid_fields: {field or check name: number of rejected frames or commands}
+- malformed: frames rejected before decoding (eg. wrong length)
+"""
+
+import bisect
+import functools
+import http.server
+import threading
+import time
+
+from .registry import protocols
+
+# upper bounds (seconds) of the latency histogram buckets, the last bucket holds everything above
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2)
+
+# {command class: ProtocolMetrics} of the instrumented classes
+_METRICS = {}
+# {command class: (original encode_bytes, original from_dump)}
+_ORIGINALS = {}
+_lock = threading.Lock()
+
+
+class Histogram(object):
+    """latency histogram with fixed buckets (see BUCKETS)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self):
+        return {"buckets": dict(zip(BUCKETS + (float("inf"),), self.counts)), "sum": self.sum, "count": self.count}
+
+
+class ProtocolMetrics(object):
+    """counters and histograms of a command class, see the module documentation"""
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.encodes = 0
+            self.decodes = 0
+            self.checksum_failures = 0
+            self.header_mismatches = 0
+            self.invalid_fields = {}
+            self.malformed = 0
+            self.encode_latency = Histogram()
+            self.decode_latency = Histogram()
+
+    def encoded(self, seconds, error=None):
+        with self._lock:
+            self.encodes += 1
+            self.encode_latency.observe(seconds)
+            if error is not None:
+                self._rejected(error)
+
+    def decoded(self, seconds, checksum=None, error=None):
+        with self._lock:
+            self.decodes += 1
+            self.decode_latency.observe(seconds)
+            if error is not None:
+                self._rejected(error)
+            elif checksum != "check_OK":
+                self.checksum_failures += 1
+
+    def _rejected(self, error):
+        name = getattr(error, "name", None)
+        if name == "header":
+            self.header_mismatches += 1
+        elif name is not None:
+            self.invalid_fields[name] = self.invalid_fields.get(name, 0) + 1
+        else:
+            self.malformed += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "encodes": self.encodes,
+                "decodes": self.decodes,
+                "checksum_failures": self.checksum_failures,
+                "header_mismatches": self.header_mismatches,
+                "invalid_fields": dict(self.invalid_fields),
+                "malformed": self.malformed,
+                "encode_latency": self.encode_latency.snapshot(),
+                "decode_latency": self.decode_latency.snapshot(),
+            }
+
+
+def _instrumented_encode_bytes(original, metrics):
+    @functools.wraps(original)
+    def encode_bytes(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            frame = original(self, *args, **kwargs)
+        except ValueError as exc:
+            metrics.encoded(time.perf_counter() - started, exc)
+            raise
+        metrics.encoded(time.perf_counter() - started)
+        return frame
+
+    return encode_bytes
+
+
+def _instrumented_from_dump(original, metrics):
+    @functools.wraps(original)
+    def from_dump(cls, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = original(cls, *args, **kwargs)
+        except ValueError as exc:
+            metrics.decoded(time.perf_counter() - started, error=exc)
+            raise
+        checksum = result["checksum"] if isinstance(result, dict) else result.checksum
+        metrics.decoded(time.perf_counter() - started, checksum)
+        return result
+
+    return from_dump
+
+
+def _protocol(command_class):
+    return command_class.__name__.rsplit("_", 1)[-1]
+
+
+def enable(command_classes=None):
+    """start collecting metrics of command_classes (default: all the registered ones)"""
+    if command_classes is None:
+        command_classes = protocols()
+    with _lock:
+        for command_class in command_classes:
+            if command_class in _ORIGINALS:
+                continue
+            metrics = _METRICS.get(command_class)
+            if metrics is None:
+                metrics = _METRICS[command_class] = ProtocolMetrics(_protocol(command_class))
+            encode_bytes = command_class.__dict__["encode_bytes"]
+            from_dump = command_class.__dict__["from_dump"]
+            _ORIGINALS[command_class] = (encode_bytes, from_dump)
+            command_class.encode_bytes = _instrumented_encode_bytes(encode_bytes, metrics)
+            command_class.from_dump = classmethod(_instrumented_from_dump(from_dump.__func__, metrics))
+
+
+def disable():
+    """stop collecting metrics, the collected ones are kept"""
+    with _lock:
+        for command_class, (encode_bytes, from_dump) in _ORIGINALS.items():
+            command_class.encode_bytes = encode_bytes
+            command_class.from_dump = from_dump
+        _ORIGINALS.clear()
+
+
+def enabled():
+    return bool(_ORIGINALS)
+
+
+def snapshot():
+    """return {protocol (eg. "W001CP"): metrics dict} of every protocol instrumented so far"""
+    with _lock:
+        return {metrics.protocol: metrics.snapshot() for metrics in _METRICS.values()}
+
+
+def reset():
+    """set all the counters and histograms back to zero"""
+    with _lock:
+        for metrics in _METRICS.values():
+            metrics.reset()
+
+
+def _labels(**labels):
+    escaped = ((k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels.items())
+    return "{%s}" % ",".join('%s="%s"' % _ for _ in escaped)
+
+
+def prometheus_text():
+    """return the metrics in the Prometheus text exposition format"""
+    counters = (
+        ("encodes", "encode_bytes() calls"),
+        ("decodes", "from_dump() calls"),
+        ("checksum_failures", "decoded frames with a wrong checksum"),
+        ("header_mismatches", "frames rejected because of their header"),
+        ("malformed", "frames rejected before decoding"),
+    )
+    metrics = snapshot()
+    lines = []
+    for name, help_text in counters:
+        lines.append("# HELP hvac_ir_%s_total %s" % (name, help_text))
+        lines.append("# TYPE hvac_ir_%s_total counter" % name)
+        for protocol, values in sorted(metrics.items()):
+            lines.append("hvac_ir_%s_total%s %d" % (name, _labels(protocol=protocol), values[name]))
+    lines.append("# HELP hvac_ir_invalid_fields_total frames or commands rejected because of a field")
+    lines.append("# TYPE hvac_ir_invalid_fields_total counter")
+    for protocol, values in sorted(metrics.items()):
+        for field, count in sorted(values["invalid_fields"].items()):
+            lines.append("hvac_ir_invalid_fields_total%s %d" % (_labels(protocol=protocol, field=field), count))
+    for name in ("encode", "decode"):
+        lines.append("# HELP hvac_ir_%s_seconds latency of %s" % (name, name))
+        lines.append("# TYPE hvac_ir_%s_seconds histogram" % name)
+        for protocol, values in sorted(metrics.items()):
+            histogram = values[name + "_latency"]
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("hvac_ir_%s_seconds_bucket%s %d" % (name, _labels(protocol=protocol, le=le), cumulative))
+            lines.append("hvac_ir_%s_seconds_sum%s %r" % (name, _labels(protocol=protocol), histogram["sum"]))
+            lines.append("hvac_ir_%s_seconds_count%s %d" % (name, _labels(protocol=protocol), histogram["count"]))
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start_http_server(port, address="127.0.0.1"):
+    """serve prometheus_text() on http://address:port/metrics from a daemon thread, return the server"""
+    server = http.server.ThreadingHTTPServer((address, port), _Handler)
+    thread = threading.Thread(target=server.serve_forever, name="hvac_ir metrics", daemon=True)
+    thread.start()
+    return server
@@ -2,12 +2,32 @@
 
 import datetime
 
-
+from .codec import (
+    BITSTRINGS,
+    REVERSED_BYTES,
+    Check,
+    Field,
+    FrameCodec,
+    bitstring_to_bytes,
+    bytes_to_bitstring,
+    dump_to_frame,
+)
+from .formats import broadlink_packet, pronto_code
+from .frame import FrameTemplate
+from .pulses import pulse_train
+from .registry import register
+from .result import Checksum, result_type
+
+
+@register
 class MitsubishiCommand_W001CP(object):
 
+    __slots__ = ("power", "hvac_mode", "temperature", "fan", "vane", "timer", "timer_on", "timer_off")
+
     _header = "00100011" + "11001011" + "00100110" + "00100001" + "00000000"
 
     # protocol informations
+    protocol_header = bitstring_to_bytes(_header)
     protocol_bytes = 17
     protocol_repeats = 1
     protocol_parameters = {
@@ -17,6 +37,51 @@ class MitsubishiCommand_W001CP(object):
         "fan": (1, 2, 3, 4),
         "vane": ("auto", 0, 1, 2, 3),
     }
+    # https://github.com/r45635/HVAC-IR-Control/blob/master/Protocol/Mitsubishi_W001CP_IR_Packet_Data_v1.0-FULL.pdf
+    protocol_template = (
+        protocol_header
+        + bytes(
+            (
+                0b00000000,  # byte 5: power status on / off
+                0b00000000,  # byte 6: temperature + HVAC mode
+                0b00000001,  # byte 7: vanne + FAN (last bit always set)
+                0b00000100,  # byte 8: timer mode
+                0b00000000,  # byte 9: PowerOff countdown (in 1/6th hours)
+                0b00000000,  # byte 10: PowerOn  countdown (in 1/6th hours)
+            )
+        )
+        # bytes 11~16: XOR of bytes 5~10
+        + bytes(6)
+    )
+    protocol_fields = (
+        Field("power", 5, 0, 8, {True: 0b01000000, False: 0b00000000}),
+        Field("hvac_mode", 6, 0, 4, {"fan": 0b0000, "cold": 0b0001, "heat": 0b0010, "auto": 0b0011, "dry": 0b0101}),
+        Field("temperature", 6, 4, 4, {t: t - 16 for t in protocol_parameters["temperature"]}),
+        Field("fan", 7, 1, 3, {f: f - 1 for f in protocol_parameters["fan"]}),
+        # any vane position is accepted when decoding
+        Field("vane", 7, 4, 4, {"auto": 12, 0: 0, 1: 1, 2: 2, 3: 3}, decode={**{_: _ for _ in range(16)}, 12: "auto"}),
+        # timers are not yet implemented when encoding
+        Field(
+            "timer_mode",
+            8,
+            0,
+            2,
+            {"timer_off": 0b00, "timer_powreoff": 0b01, "timer_poweron": 0b10, "timer_poweronoff": 0b11},
+            encode=False,
+        ),
+        Field("timer_on", 9, 0, 8, {_: _ for _ in range(256)}, encode=False),
+        Field("timer_off", 10, 0, 8, {_: _ for _ in range(256)}, encode=False),
+    )
+    protocol_checks = tuple(Check("header", _, 0b11111111) for _ in range(5)) + (
+        Check("timer mode byte", 8, 0b11111100),
+    )
+    protocol_codec = FrameCodec(protocol_template, protocol_fields, protocol_checks, protocol_parameters)
+
+    # typed from_dump() result
+    Result = result_type(__name__, "MitsubishiCommand_W001CP", protocol_codec.decoded_names, {"timer_mode": "timer"})
+
+    # optional hvac_ir.cache.EncodeCache of encoded frames
+    encode_cache = None
 
     # pyslinger settings
     pyslinger_protocol = "NEC"
@@ -56,174 +121,166 @@ class MitsubishiCommand_W001CP(object):
         return my_str
 
     def encode(self, lsb=True):
-        # bytes 0~4: constant header
-        bitstring = self._header
-        # byte 5: power status on / off
-        bitstring += self.encode_power()
-        # byte 6: temperature + HVAC mode
-        bitstring += self.encode_temperature()  # 4 bits
-        bitstring += self.encode_hvac_mode()    # 4 bits
-        # byte 7: FAN & vanne
-        bitstring += self.encode_vane()         # 4 bits
-        bitstring += self.encode_fan()          # 4 bits
-        # byte 8: timer mode
-        bitstring += "00000100" # not yet implemented
-        # byte 9: PowerOff countdown (in 1/6th hours)
-        bitstring += "0" * 8    # not yet implemented
-        # byte 10: PowerOn  countdown (in 1/6th hours)
-        bitstring += "0" * 8    # not yet implemented
+        return bytes_to_bitstring(self.encode_bytes(lsb))
+
+    def encode_bytes(self, lsb=True):
+        cache = self.encode_cache
+        if cache is None:
+            return self._encode_frame(lsb)
+        key = (self.protocol_codec.encode_key(self), lsb)
+        frame = cache.get(key)
+        if frame is None:
+            frame = self._encode_frame(lsb)
+            cache.put(key, frame)
+        return frame
+
+    def _encode_frame(self, lsb):
+        # bytes 0~10: header and fields
+        frame = self.protocol_codec.encode(self)
         # bytes 11~16: XOR of bytes 5~10
-        bitstring += self.checksum(bitstring)
+        for pos in range(5, 11):
+            frame[pos + 6] = 255 ^ frame[pos]
+        frame = bytes(frame)
         # reverse to Least Significant Bit first if required
         if lsb:
-            reversed_bitstring = ""
-            for _ in range(0, len(bitstring), 8):
-                reversed_bitstring += bitstring[_ : _ + 8][::-1]
-            bitstring = reversed_bitstring
-        # sanity check and we"re done
-        if len(bitstring) != 136:
-            raise RuntimeError("bitstring should be 136 bits but it is %d" % len(bitstring))
-        return bitstring
+            frame = frame.translate(REVERSED_BYTES)
+        return frame
+
+    def encode_pulses(self):
+        """return the mark / space durations (in microseconds) to transmit, see hvac_ir.pulses"""
+        return pulse_train(type(self), self.encode_bytes(lsb=True))
+
+    def encode_broadlink(self, repeat=0):
+        """return the Broadlink packet to transmit, see hvac_ir.formats"""
+        return broadlink_packet(type(self), self.encode_bytes(lsb=True), repeat)
+
+    def encode_pronto(self):
+        """return the Pronto hex code to transmit, see hvac_ir.formats"""
+        return pronto_code(type(self), self.encode_bytes(lsb=True))
 
     def encode_power(self):
-        if self.power is True:
-            return "01000000"
-        elif self.power is False:
-            return "00000000"
-        else:
-            raise ValueError
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 5)]
 
     def encode_temperature(self):
-        if not 16 <= self.temperature <= 31:
-            raise ValueError
-        temp = self.temperature - 16
-        bitstring = "{0:04b}".format(temp)
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 6)][0:4]
 
     def encode_hvac_mode(self):
-        if self.hvac_mode == "fan":
-            return "0000"
-        elif self.hvac_mode == "cold":
-            return "0001"
-        elif self.hvac_mode == "heat":
-            return "0010"
-        elif self.hvac_mode == "auto":
-            return "0011"
-        elif self.hvac_mode == "dry":
-            return "0101"
-        else:
-            raise ValueError
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 6)][4:8]
 
     def encode_vane(self):
-        if self.vane not in self.protocol_parameters["vane"]:
-            raise ValueError("wrong vane value %s" % repr(self.vane))
-        vane = 12 if self.vane == "auto" else self.vane
-        bitstring = "{0:04b}".format(vane)
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 7)][0:4]
 
     def encode_fan(self):
-        bitstring = "0"
-        if isinstance(self.fan, int) and 0 < self.fan < 5:
-            bitstring += "{0:02b}".format(self.fan - 1)
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 7)][4:8]
+
+    @classmethod
+    def patch_byte(cls, frame, byte, value, lsb=True):
+        """set a byte of an encoded frame (a bytearray) to value in place and update its checksum"""
+        if lsb:
+            frame[byte] = REVERSED_BYTES[value]
+            if 5 <= byte <= 10:
+                frame[byte + 6] = REVERSED_BYTES[255 ^ value]
         else:
-            raise ValueError("invalid fan value %s" % repr(self.fan))
-        bitstring += "1"
-        return bitstring
+            frame[byte] = value
+            if 5 <= byte <= 10:
+                frame[byte + 6] = 255 ^ value
+        return frame
+
+    @staticmethod
+    def finish_batch(frames, time_of_day=None):
+        """set the checksums of an (N, 17) numpy array of frames (MSB first) in place"""
+        # bytes 11~16: XOR of bytes 5~10
+        frames[:, 11:17] = 255 ^ frames[:, 5:11]
+        return frames
+
+    @staticmethod
+    def verify_batch(frames):
+        """return the mask of the rows of an (N, 17) numpy array of frames (MSB first) with right checksums"""
+        return (frames[:, 11:17] == 255 ^ frames[:, 5:11]).all(axis=1)
 
     @staticmethod
     def checksum(bitstring):
         if len(bitstring) != 88:
             raise ValueError("bitstring to checksum is %d bits" % len(bitstring))
-        if isinstance(bitstring, tuple):
-            bitstring = "".join(bitstring)
+        if not isinstance(bitstring, str):
+            # tuples of "0" / "1" or lists of 0 / 1 ints
+            bitstring = "".join(str(_) for _ in bitstring)
         # calculate checksum
-        checksum_bitstring = ""
-        for pos in range(5, 11):
-            my_byte = bitstring[8 * pos : 8 * pos + 8]
-            my_value = int("".join(str(i) for i in my_byte), 2)
-            xor_value = 255 ^ my_value
-            checksum_bitstring += "{0:08b}".format(xor_value)
-        return checksum_bitstring
+        frame = bitstring_to_bytes(bitstring)
+        return bytes_to_bitstring([255 ^ _ for _ in frame[5:11]])
 
     @classmethod
-    def from_dump(cls, binary_dump):
-        # https://github.com/r45635/HVAC-IR-Control/blob/master/Protocol/Mitsubishi_W001CP_IR_Packet_Data_v1.0-FULL.pdf
-        binary_dump = tuple([int(_) for _ in binary_dump])
+    def repair(cls, frame, max_flips=2):
+        """repair a frame (MSB first) using the header and the complement bytes 11~16
+
+        Every byte 5~10 which disagrees with its complement costs as many bit flips as the bits they disagree
+        on, and is replaced by its single valid candidate: the data or the complement copy as they are (a burst
+        usually hits one of them only), or else any value they agree with. Return the repaired frame and the
+        number of flipped bits, raise ValueError if more than max_flips bits must be flipped or if a byte has
+        no or more than one candidate value.
+        """
+        codec = cls.protocol_codec
+        frame = bytearray(frame)
         # bytes 0~4: constant header
-        header = "".join(str(_) for _ in binary_dump[0:40])
-        if header != cls._header:
-            raise ValueError("wrong header: %s" % header)
-        # byte 5: power status on / off
-        if binary_dump[40:48] == (0, 0, 0, 0, 0, 0, 0, 0):
-            power = False
-        elif binary_dump[40:48] == (0, 1, 0, 0, 0, 0, 0, 0):
-            power = True
-        else:
-            raise ValueError("wrong power byte: " + repr(binary_dump[40:48]))
-        # byte 6: temperature + HVAC mode
-        temperature = 16 + int("".join(str(i) for i in binary_dump[48:52]), 2)
-        if binary_dump[52:56] == (0, 0, 0, 0):
-            hvac_mode = "fan"
-        elif binary_dump[52:56] == (0, 0, 0, 1):
-            hvac_mode = "cold"
-        elif binary_dump[52:56] == (0, 0, 1, 0):
-            hvac_mode = "heat"
-        elif binary_dump[52:56] == (0, 0, 1, 1):
-            hvac_mode = "auto"
-        elif binary_dump[52:56] == (0, 1, 0, 1):
-            hvac_mode = "dry"
-        else:
-            raise ValueError("wrong HVAC mode (%s)" % repr(binary_dump[52:56]))
-        # byte 7: FAN & vanne
-        my_byte = binary_dump[56:64]
-        fan = int("".join(str(i) for i in my_byte[4:7]), 2) + 1
-        if not 0 < fan < 5:
-            raise ValueError("wrong fan speed %d: %s" % (fan, repr(my_byte[4:8])))
-        vane = int("".join(str(i) for i in my_byte[0:4]), 2)
-        if vane == 12:
-            vane = "auto"
-        # byte  8: timer mode
-        my_byte = binary_dump[64:72]
-        if my_byte[0:6] != (0, 0, 0, 0, 0, 1):
-            raise ValueError("wrong timer mode byte: " + repr(my_byte))
-        if my_byte[6:8] == (0, 0):
-            timer_mode = "timer_off"
-        elif my_byte[6:8] == (0, 1):
-            timer_mode = "timer_powreoff"
-        elif my_byte[6:8] == (1, 0):
-            timer_mode = "timer_poweron"
-        elif my_byte[6:8] == (1, 1):
-            timer_mode = "timer_poweronoff"
-        else:
-            raise ValueError("wrong timer mode byte: " + repr(my_byte))
-        # byte  9: PowerOff countdown (in 1/6th hours)
-        my_byte = binary_dump[72:80]
-        timer_on = int("".join(str(i) for i in my_byte), 2)
-        # byte 10: PowerOn  countdown (in 1/6th hours)
-        my_byte = binary_dump[80:88]
-        timer_off = int("".join(str(i) for i in my_byte), 2)
-        # bytes 11~16: XOR of bytes 5~10
-        checksum = "check_OK"
+        flips = sum(bin(a ^ b).count("1") for a, b in zip(frame[0:5], cls.protocol_header))
+        frame[0:5] = cls.protocol_header
+        # bytes 5~10 and their complements 11~16
         for pos in range(5, 11):
-            my_byte = binary_dump[8 * pos : 8 * pos + 8]
-            my_value = int("".join(str(i) for i in my_byte), 2)
-            xor_byte = binary_dump[8 * pos + 48 : 8 * pos + 56]
-            xor_value = int("".join(str(i) for i in xor_byte), 2)
-            if xor_value != (255 ^ my_value):
-                checksum = "check_BAD"
-        return {
-            "power": power,
-            "hvac_mode": hvac_mode,
-            "temperature": temperature,
-            "fan": fan,
-            "vane": vane,
-            "timer_mode": timer_mode,
-            "timer_on": timer_on,
-            "timer_off": timer_off,
-            "checksum": checksum,
-        }
-
+            data = frame[pos]
+            complement = 255 ^ frame[pos + 6]
+            diff = data ^ complement
+            if not diff:
+                continue
+            flips += bin(diff).count("1")
+            if flips > max_flips:
+                break
+            candidates = [_ for _ in (data, complement) if codec.valid_byte(pos, _)]
+            if not candidates:
+                # every combination of the disagreeing bits
+                flipped = diff
+                while flipped:
+                    if codec.valid_byte(pos, data ^ flipped):
+                        candidates.append(data ^ flipped)
+                    flipped = (flipped - 1) & diff
+            if len(candidates) != 1:
+                raise ValueError("byte %d has %d candidate values" % (pos, len(candidates)))
+            frame[pos] = candidates[0]
+            frame[pos + 6] = 255 ^ candidates[0]
+        if flips > max_flips:
+            raise ValueError("more than %d bits to flip" % max_flips)
+        return bytes(frame), flips
 
+    @classmethod
+    def from_dump(cls, binary_dump, lsb=False, as_dict=True, max_flips=0):
+        """decode a frame given as packed bytes or as an iterable of bits (see encode() for lsb)
+
+        Return a dict, or a Result named tuple if as_dict is False. If max_flips is not zero, frames with a
+        wrong header or checksum are repaired (see repair()) and their checksum is "check_CORRECTED", or
+        "check_UNCORRECTABLE" if they could not be repaired but their fields are still valid.
+        """
+        frame = dump_to_frame(binary_dump, cls.protocol_bytes, lsb)
+        # bytes 11~16: XOR of bytes 5~10
+        checksum = Checksum.OK
+        for pos in range(5, 11):
+            if frame[pos + 6] != (255 ^ frame[pos]):
+                checksum = Checksum.BAD
+        if max_flips and (checksum is Checksum.BAD or frame[0:5] != cls.protocol_header):
+            try:
+                frame = cls.repair(frame, max_flips)[0]
+                checksum = Checksum.CORRECTED
+            except ValueError:
+                checksum = Checksum.UNCORRECTABLE
+        # bytes 0~10: header and fields
+        values = cls.protocol_codec.decode_values(frame)
+        if as_dict:
+            result = dict(zip(cls.protocol_codec.decoded_names, values))
+            result["checksum"] = checksum.value
+            return result
+        values.append(checksum)
+        return cls.Result._make(values)
+
+
+@register
 class MitsubishiCommand_SG14D(object):
     """Mitsubishi SG14D remote control
     off       --> heat_17_1: rimane almeno 35min <50W
@@ -231,10 +288,13 @@ class MitsubishiCommand_SG14D(object):
     heat_28_1 --> off      : consumi zero in <30s
     """
 
+    __slots__ = ("power", "hvac_mode", "isee", "temperature", "fan", "vane", "econocool", "clock")
+
     _header = "00100011" + "11001011" + "00100110" + "00000001" + "00000000"
     _footer = "00010" + "00000000" + "00000000"
 
     # protocol informations
+    protocol_header = bitstring_to_bytes(_header)
     protocol_bytes = 18
     protocol_repeats = 2
     protocol_parameters = {
@@ -246,6 +306,82 @@ class MitsubishiCommand_SG14D(object):
         "vane": ("auto", 1, 2, 3, 4, 5, "move"),
         "econocool": (True, False),
     }
+    # https://github.com/r45635/HVAC-IR-Control/tree/master/Protocol
+    protocol_template = (
+        protocol_header
+        + bytes(
+            (
+                0b00000000,  # byte 5: power status
+                0b00000000,  # byte 6: HVAC mode + iSee
+                0b00000000,  # byte 7: temperature
+                0b00110000,  # byte 8: HVAC mode (again)
+                0b00000000,  # byte 9: fan & vanne
+                0b00000000,  # byte 10: clock
+                0b00000000,  # byte 11: end clock (to be done)
+                0b00000000,  # byte 12: start clock (to be done)
+                0b00000000,  # byte 13: timer mode (to be done), possibly Area Mode?
+            )
+        )
+        # bytes 14~16: econocool + footer
+        + int(_footer, 2).to_bytes(3, "big")
+        # byte 17: checksum
+        + bytes(1)
+    )
+    protocol_fields = (
+        Field("power", 5, 0, 8, {True: 0b00100000, False: 0b00000000}),
+        Field("isee", 6, 6, 1, {True: 1, False: 0}),
+        Field("hvac_mode", 6, 3, 3, {"auto": 0b100, "heat": 0b001, "dry": 0b010, "cold": 0b011, "fan": 0b111}),
+        Field("temperature", 7, 0, 4, {t: t - 16 for t in protocol_parameters["temperature"]}),
+        # TBD: we currently ignore this one when decoding
+        Field(
+            "hvac_mode",
+            8,
+            0,
+            3,
+            {"auto": 0b110, "heat": 0b000, "dry": 0b010, "cold": 0b110, "fan": 0b000},
+            decode=False,
+        ),
+        # first two bits of byte 9 *seem* to command the HVAC unit beeper
+        # 01 = single standard beep
+        # 10 = double short beep
+        #       |- used when switching to temperature extremes (16 & 31 C)
+        #       |- used when switching from manual to auto fan
+        #       \- used when switching from manual to auto vane
+        Field(
+            "temperature",
+            9,
+            6,
+            2,
+            {t: 0b10 if t in (16, 31) else 0b01 for t in protocol_parameters["temperature"]},
+            decode=False,
+        ),
+        # the following 3 bits are the fan settings: 0=auto, N=fixed speed, -2=quiet
+        Field("fan", 9, 0, 3, {"auto": 0b000, 1: 0b001, 2: 0b010, 3: 0b011, 4: 0b100, "quiet": 0b101}),
+        # the following 3 bits are the vane setting: 0=auto, N=fixed position, -1=move
+        Field(
+            "vane",
+            9,
+            3,
+            3,
+            {"auto": 0b000, 1: 0b001, 2: 0b010, 3: 0b011, 4: 0b100, 5: 0b101, "move": 0b111},
+            decode={0b000: "auto", 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 0b111: "move"},
+        ),
+        Field("econocool", 14, 5, 1, {True: 1, False: 0}),
+    )
+    protocol_checks = tuple(Check("header", _, 0b11111111) for _ in range(5)) + (
+        Check("HVAC mode", 6, 0b10000111),
+        Check("temperature byte", 7, 0b11110000),
+        Check("footer", 14, 0b00011111),
+        Check("footer", 15, 0b11111111),
+        Check("footer", 16, 0b11111111),
+    )
+    protocol_codec = FrameCodec(protocol_template, protocol_fields, protocol_checks, protocol_parameters)
+
+    # typed from_dump() result
+    Result = result_type(__name__, "MitsubishiCommand_SG14D", protocol_codec.decoded_names)
+
+    # optional hvac_ir.cache.EncodeCache of encoded frames
+    encode_cache = None
 
     # pyslinger settings
     pyslinger_protocol = "NEC"
@@ -264,7 +400,7 @@ class MitsubishiCommand_SG14D(object):
     )
 
     def __init__(self, power=False, hvac_mode="cold", isee=False,
-                 temperature=24, fan="auto", vane="auto", econocool=False):
+                 temperature=24, fan="auto", vane="auto", econocool=False, clock=None):
         self.power = power
         self.hvac_mode = hvac_mode
         self.isee = isee
@@ -272,6 +408,8 @@ class MitsubishiCommand_SG14D(object):
         self.fan = fan
         self.vane = vane
         self.econocool = econocool
+        # callable returning the time of day to encode, datetime.datetime.now() if None
+        self.clock = clock
 
     def __str__(self):
         parms = [
@@ -286,42 +424,47 @@ class MitsubishiCommand_SG14D(object):
         my_str = "<MitsubishiCommand_SG14D(" + ", ".join(parms) + ")>"
         return my_str
 
-    def encode(self, lsb=True):
-        # bytes 0~4: constant header
-        bitstring = self._header
-        # byte 5: power status
-        bitstring += self.encode_power()
-        # byte 6: HVAC mode
-        bitstring += self.encode_hvac_mode()
-        # byte 7: temperature
-        bitstring += self.encode_temperature()
-        # byte 8: HVAC mode (again)
-        bitstring += self.encode_hvac_again()
-        # byte 9: fan & vanne
-        bitstring += self.encode_fan_vanne()
+    def encode(self, lsb=True, time_of_day=None):
+        return bytes_to_bitstring(self.encode_bytes(lsb, time_of_day))
+
+    def encode_bytes(self, lsb=True, time_of_day=None):
+        clock = self.timeofday_value(self._now() if time_of_day is None else time_of_day)
+        cache = self.encode_cache
+        if cache is None:
+            return self._encode_frame(lsb, clock)
+        key = (self.protocol_codec.encode_key(self), lsb, clock)
+        frame = cache.get(key)
+        if frame is None:
+            frame = self._encode_frame(lsb, clock)
+            cache.put(key, frame)
+        return frame
+
+    def _encode_frame(self, lsb, clock):
+        # bytes 0~16: header, fields and footer
+        frame = self.protocol_codec.encode(self)
         # byte 10: clock
-        bitstring += self.encode_timeofday(datetime.datetime.now())
-        # bytes 11, 12: start and end clock (to be done)
-        bitstring += "0" * 8 * 2
-        # byte 13: timer mode (to be done)
-        # ...and possibly Area Mode?
-        bitstring += "0" * 8
-        # byte 14: econocool
-        bitstring += self.encode_econocool()
-        # byte 15 & 16: constant
-        bitstring += self._footer
+        frame[10] = clock
         # byte 17: checksum
-        bitstring += self.checksum(bitstring)
+        frame[17] = sum(frame[0:17]) & 0xFF
+        frame = bytes(frame)
         # reverse to Least Significant Bit first if required
         if lsb:
-            reversed_bitstring = ""
-            for _ in range(0, len(bitstring), 8):
-                reversed_bitstring += bitstring[_ : _ + 8][::-1]
-            bitstring = reversed_bitstring
-        # sanity check and we"re done
-        if len(bitstring) != 144:
-            raise RuntimeError
-        return bitstring
+            frame = frame.translate(REVERSED_BYTES)
+        return frame
+
+    @classmethod
+    def finish_batch(cls, frames, time_of_day=None):
+        """set the clocks and checksums of an (N, 18) numpy array of frames (MSB first) in place"""
+        # byte 10: clock
+        frames[:, 10] = cls.timeofday_value(datetime.datetime.now() if time_of_day is None else time_of_day)
+        # byte 17: checksum
+        frames[:, 17] = frames[:, 0:17].sum(axis=1) & 0xFF
+        return frames
+
+    @staticmethod
+    def verify_batch(frames):
+        """return the mask of the rows of an (N, 18) numpy array of frames (MSB first) with right checksums"""
+        return frames[:, 0:17].sum(axis=1) & 0xFF == frames[:, 17]
 
     @staticmethod
     def checksum(bitstring):
@@ -330,217 +473,92 @@ class MitsubishiCommand_SG14D(object):
         if isinstance(bitstring, tuple):
             bitstring = "".join(bitstring)
         # calculate checksum
-        checksum = 0
-        for _ in range(17):
-            byte_value = int(bitstring[_ * 8 : _ * 8 + 8], 2)
-            checksum += byte_value
-        checksum %= 256
+        checksum = sum(bitstring_to_bytes(bitstring)) % 256
         # bring it back to binary string representation
-        return "{0:08b}".format(checksum)
+        return BITSTRINGS[checksum]
+
+    def encode_pulses(self, time_of_day=None):
+        """return the mark / space durations (in microseconds) to transmit, see hvac_ir.pulses"""
+        return pulse_train(type(self), self.encode_bytes(True, time_of_day))
+
+    def encode_broadlink(self, repeat=0, time_of_day=None):
+        """return the Broadlink packet to transmit, see hvac_ir.formats"""
+        return broadlink_packet(type(self), self.encode_bytes(True, time_of_day), repeat)
+
+    def encode_pronto(self, time_of_day=None):
+        """return the Pronto hex code to transmit, see hvac_ir.formats"""
+        return pronto_code(type(self), self.encode_bytes(True, time_of_day))
+
+    def template(self, lsb=True):
+        """return a FrameTemplate of this command, whose clock is updated in place on each render()"""
+        return FrameTemplate(self, lsb)
+
+    def _now(self):
+        return datetime.datetime.now() if self.clock is None else self.clock()
 
     def encode_power(self):
-        if self.power is True:
-            return "00100000"
-        elif self.power is False:
-            return "00000000"
-        raise ValueError
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 5)]
 
     def encode_hvac_mode(self):
-        bitstring = "0"
-        if self.isee is True:
-            bitstring += "1"
-        elif self.isee is False:
-            bitstring += "0"
-        else:
-            raise ValueError
-        if self.hvac_mode == "auto":
-            bitstring += "100"
-        elif self.hvac_mode == "heat":
-            bitstring += "001"
-        elif self.hvac_mode == "dry":
-            bitstring += "010"
-        elif self.hvac_mode == "cold":
-            bitstring += "011"
-        elif self.hvac_mode == "fan":
-            bitstring += "111"
-        else:
-            raise ValueError
-        bitstring += "000"
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 6)]
 
     def encode_temperature(self):
-        bitstring = "0000"
-        if not 16 <= self.temperature <= 31:
-            raise ValueError
-        temp = self.temperature - 16
-        bitstring += "{0:04b}".format(temp)
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 7)]
 
     def encode_hvac_again(self):
-        bitstring = "00110"
-        if self.hvac_mode == "auto":
-            bitstring += "110"
-        elif self.hvac_mode == "heat":
-            bitstring += "000"
-        elif self.hvac_mode == "dry":
-            bitstring += "010"
-        elif self.hvac_mode == "cold":
-            bitstring += "110"
-        elif self.hvac_mode == "fan":
-            bitstring += "000"
-        else:
-            raise ValueError
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 8)]
 
     def encode_fan_vanne(self):
         """encode byte 9 (fan & vanne parameters)"""
-        # first two bits *seem* to command the HVAC unit beeper
-        # 01 = single standard beep
-        # 10 = double short beep
-        #       |- used when switching to temperature extremes (16 & 31 C)
-        #       |- used when switching from manual to auto fan
-        #       \- used when switching from manual to auto vane
-        if self.temperature in (16, 31):
-            bitstring = "10"
-        else:
-            bitstring = "01"
-        # the following 3 bits are the vane setting: 0=auto, N=fixed position, -1=move
-        if self.vane == "auto":
-            bitstring += "000"
-        elif self.vane == 1:
-            bitstring += "001"
-        elif self.vane == 2:
-            bitstring += "010"
-        elif self.vane == 3:
-            bitstring += "011"
-        elif self.vane == 4:
-            bitstring += "100"
-        elif self.vane == 5:
-            bitstring += "101"
-        elif self.vane == "move":
-            bitstring += "111"
-        else:
-            raise ValueError
-        # the following 3 bits are the fan settings: 0=auto, N=fixed speed, -2=quiet
-        if self.fan == "auto":
-            bitstring += "000"
-        elif self.fan == 1:
-            bitstring += "001"
-        elif self.fan == 2:
-            bitstring += "010"
-        elif self.fan == 3:
-            bitstring += "011"
-        elif self.fan == 4:
-            bitstring += "100"
-        elif self.fan == "quiet":
-            bitstring += "101"
-        else:
-            raise ValueError
-        return bitstring
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 9)]
 
     def encode_timeofday(self, time_of_day):
-        # time is represented as the count of 10-minute intervals from midnight
-        # eg. 15:53 is 15*60 + 5
-        time_counter = time_of_day.hour * 6
-        time_counter += time_of_day.minute // 10
-        bitstring = "{0:08b}".format(time_counter)
-        return bitstring
+        return BITSTRINGS[self.timeofday_value(time_of_day)]
 
     def encode_econocool(self):
-        if self.econocool is True:
-            return "001"
-        elif self.econocool is False:
-            return "000"
-        raise ValueError
+        return BITSTRINGS[self.protocol_codec.encode_byte(self, 14)][0:3]
+
+    @staticmethod
+    def timeofday_value(time_of_day):
+        """return the clock byte of a time of day (datetime or time), eg. to compare with sent frames"""
+        # time is represented as the count of 10-minute intervals from midnight
+        # eg. 15:53 is 15*6 + 5
+        return time_of_day.hour * 6 + time_of_day.minute // 10
 
     @classmethod
-    def from_dump(cls, binary_dump):
-        # https://github.com/r45635/HVAC-IR-Control/tree/master/Protocol
-        binary_dump = tuple([int(_) for _ in binary_dump])
-        # check length
-        if len(binary_dump) != cls.protocol_bytes * 8:
-            raise ValueError(
-                "length of %d bits does not match protocol length %d bits" % (len(binary_dump), cls.protocol_bytes * 8)
-            )
-        # bytes 0~4: constant
-        header = "".join(str(_) for _ in binary_dump[0:40])
-        if header != cls._header:
-            raise ValueError("wrong header: %s instead of %s" % (header, cls._header))
-        # byte 5: power status on / off
-        if binary_dump[40:48] == (0, 0, 0, 0, 0, 0, 0, 0):
-            power = False
-        elif binary_dump[40:48] == (0, 0, 1, 0, 0, 0, 0, 0):
-            power = True
-        else:
-            raise ValueError("wrong power byte: " + repr(binary_dump[40:48]))
-        # byte 6: HVAC mode + iSee
-        if binary_dump[48] != 0 or binary_dump[53:56] != (0, 0, 0):
-            raise ValueError("wrong HVAC mode")
-        isee = bool(binary_dump[49])
-        if binary_dump[50:53] == (1, 0, 0):
-            hvac_mode = "auto"
-        elif binary_dump[50:53] == (0, 0, 1):
-            hvac_mode = "heat"
-        elif binary_dump[50:53] == (0, 1, 0):
-            hvac_mode = "dry"
-        elif binary_dump[50:53] == (0, 1, 1):
-            hvac_mode = "cold"
-        elif binary_dump[50:53] == (1, 1, 1):
-            hvac_mode = "fan"
-        else:
-            raise ValueError("wrong HVAC mode (%s)" % repr(binary_dump[49:53]))
-        # byte 7: temperature
-        if binary_dump[56:60] != (0, 0, 0, 0):
-            raise ValueError("wrong temperature byte")
-        # temperature = "temp_%d" % (16 + int("".join(str(i) for i in binary_dump[60:64]), 2))
-        temperature = 16 + int("".join(str(i) for i in binary_dump[60:64]), 2)
-        # byte 8: HVAC mode, again
-        # TBD: we currently ignore this one
-        # byte 9: FAN & vanne
-        byte9 = binary_dump[72:80]
-        fan = int("".join(str(i) for i in binary_dump[77:80]), 2)
-        if 0 < fan < 5:
-            pass
-        elif fan == 0:
-            fan = "auto"
-        elif fan == 5:
-            fan = "quiet"
-        else:
-            raise ValueError("wrong fan speed %d (0=%s, 5-7=%s)" % (fan, byte9[0], repr(byte9[5:8])))
-        if byte9[2:5] == (1, 1, 1):
-            vane = "move"
+    def patch_byte(cls, frame, byte, value, lsb=True):
+        """set a byte of an encoded frame (a bytearray) to value in place and update its checksum"""
+        if lsb:
+            checksum = REVERSED_BYTES[frame[17]] + value - REVERSED_BYTES[frame[byte]]
+            frame[byte] = REVERSED_BYTES[value]
+            frame[17] = REVERSED_BYTES[checksum & 0xFF]
         else:
-            vane = int("".join(str(i) for i in byte9[2:5]), 2)
-            if vane == 0:
-                vane = "auto"
-        # byte 10: clock
-        # byte 11: end time
-        # byte 12: start time
-        # byte 13: timer mode
-        # byte 14: constants + econocool (bits 112 -> 120)
-        econocool = bool(binary_dump[114])                  # third bit is econocool
-        # bytes 14x & 15~16: constants                      # fourth bit of byte 14 and onwards
-        footer = "".join(str(_) for _ in binary_dump[115:136])
-        if footer != cls._footer:
-            raise ValueError("wrong header: %s instead of %s" % (footer, cls._footer))
+            frame[17] = (frame[17] + value - frame[byte]) & 0xFF
+            frame[byte] = value
+        return frame
+
+    @classmethod
+    def patch_timeofday(cls, frame, time_of_day, lsb=True):
+        """set the clock of an encoded frame (a bytearray) in place and update its checksum"""
+        return cls.patch_byte(frame, 10, cls.timeofday_value(time_of_day), lsb)
+
+    @classmethod
+    def from_dump(cls, binary_dump, lsb=False, as_dict=True):
+        """decode a frame given as packed bytes or as an iterable of bits (see encode() for lsb)
+
+        Return a dict, or a Result named tuple if as_dict is False.
+        """
+        frame = dump_to_frame(binary_dump, cls.protocol_bytes, lsb)
+        # bytes 0~16: header, fields and footer (clock, timers and start / end times are ignored)
+        values = cls.protocol_codec.decode_values(frame)
         # byte 17: checksum
-        checksum = 0
-        for _ in range(17):
-            byte_value = int("".join(str(i) for i in binary_dump[_ * 8 : _ * 8 + 8]), 2)
-            checksum += byte_value
-        checksum %= 256
-        pkt_checksum = int("".join(str(i) for i in binary_dump[136:144]), 2)
-        if checksum != pkt_checksum:
-            checksum = "check_BAD"
+        if sum(frame[0:17]) & 0xFF != frame[17]:
+            checksum = Checksum.BAD
         else:
-            checksum = "check_OK"
-        return {
-            "power": power,
-            "isee": isee,
-            "hvac_mode": hvac_mode,
-            "temperature": temperature,
-            "fan": fan,
-            "vane": vane,
-            "econocool": econocool,
-            "checksum": checksum,
-        }
+            checksum = Checksum.OK
+        if as_dict:
+            result = dict(zip(cls.protocol_codec.decoded_names, values))
+            result["checksum"] = checksum.value
+            return result
+        values.append(checksum)
+        return cls.Result._make(values)
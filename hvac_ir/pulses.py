@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Mark / space pulse trains, as consumed by IR transmitters and produced by IR receivers
+
+A pulse train is an array("I") of alternating mark (pulse) and space (gap) durations in microseconds,
+starting with the leading pulse, as described by the pyslinger_protocol_config of a command class. The
+durations of every byte value are computed once per command class, so a train is assembled by joining 17
+or 18 cached slices instead of going bit by bit.
+
+Received durations (eg. LIRC mode2 captures) are decoded by PulseDecoder, which classifies each of them
+against tolerance windows around the nominal durations and packs the bits straight into a frame.
+"""
+
+import array
+import collections
+
+from .codec import BITSTRINGS, REVERSED_BYTES
+
+# {command class: (leading pulse & gap, durations of every byte value, trailing pulse & gap)}
+_TEMPLATES = {}
+
+
+def _templates(command_class):
+    try:
+        return _TEMPLATES[command_class]
+    except KeyError:
+        pass
+    config = command_class.pyslinger_protocol_config
+    bit_durations = {
+        "0": (config["zero_pulse_duration"], config["zero_gap_duration"]),
+        "1": (config["one_pulse_duration"], config["one_gap_duration"]),
+    }
+    templates = (
+        array.array("I", (config["leading_pulse_duration"], config["leading_gap_duration"])),
+        tuple(array.array("I", [_ for bit in BITSTRINGS[byte] for _ in bit_durations[bit]]) for byte in range(256)),
+        array.array("I", (config["trailing_pulse_duration"], config["trailing_gap_duration"])),
+    )
+    _TEMPLATES[command_class] = templates
+    return templates
+
+
+def pulse_train(command_class, frame):
+    """return the pulse train of a frame in wire order (eg. encode_bytes(lsb=True)), with protocol repeats"""
+    leading, byte_templates, trailing = _templates(command_class)
+    train = array.array("I", leading)
+    for byte in frame:
+        train += byte_templates[byte]
+    train += trailing
+    if command_class.protocol_repeats > 1:
+        train *= command_class.protocol_repeats
+    return train
+
+
+# result: from_dump() dict, or None if the frame could not be decoded (see error)
+# frame: packed frame bytes, in wire order (LSB first)
+# jitter: mean and max absolute deviations (microseconds) of marks and spaces from their nominal durations
+PulseFrame = collections.namedtuple("PulseFrame", "result frame error jitter")
+
+
+class PulseDecoder(object):
+    """incremental decoder of received durations into frames of command_class
+
+    Durations are fed one at a time, alternating marks and spaces and starting with a mark. A duration
+    matches a nominal one when it is within nominal * tolerance of it. The decoder looks for a leading
+    pulse and gap, reads protocol_bytes * 8 bits and returns a PulseFrame on the trailing pulse; any
+    unexpected duration, or a frame not starting with protocol_header, makes it start looking for a
+    leading pulse again.
+    """
+
+    _IDLE, _LEADING_GAP, _BITS, _TRAILING = range(4)
+
+    def __init__(self, command_class, tolerance=0.25):
+        config = command_class.pyslinger_protocol_config
+        self.command_class = command_class
+        self.tolerance = tolerance
+        self._bits = command_class.protocol_bytes * 8
+        # header as received (LSB first) and number of bits after which it is checked
+        self._header = int.from_bytes(command_class.protocol_header.translate(REVERSED_BYTES), "big")
+        self._header_bits = len(command_class.protocol_header) * 8
+        self._leading_pulse = self._window(config["leading_pulse_duration"])
+        self._leading_gap = self._window(config["leading_gap_duration"])
+        self._one_pulse = self._window(config["one_pulse_duration"])
+        self._one_gap = self._window(config["one_gap_duration"])
+        self._zero_pulse = self._window(config["zero_pulse_duration"])
+        self._zero_gap = self._window(config["zero_gap_duration"])
+        self._trailing_pulse = self._window(config["trailing_pulse_duration"])
+        self.reset()
+
+    def _window(self, nominal):
+        return (nominal * (1 - self.tolerance), nominal * (1 + self.tolerance), nominal)
+
+    def reset(self):
+        """forget any partial frame, the next duration is a mark"""
+        self._is_mark = True
+        self._state = self._IDLE
+        self._mark = 0
+        self._value = 0
+        self._count = 0
+        self._mark_deviation = self._space_deviation = 0
+        self._mark_max = self._space_max = 0
+        self._marks = self._spaces = 0
+
+    def _deviation(self, duration, nominal, is_mark):
+        deviation = abs(duration - nominal)
+        if is_mark:
+            self._mark_deviation += deviation
+            self._mark_max = max(self._mark_max, deviation)
+            self._marks += 1
+        else:
+            self._space_deviation += deviation
+            self._space_max = max(self._space_max, deviation)
+            self._spaces += 1
+
+    def _bit(self, mark, space):
+        """return the bit value of a mark and space, or None"""
+        one = self._one_pulse[0] <= mark <= self._one_pulse[1] and self._one_gap[0] <= space <= self._one_gap[1]
+        zero = self._zero_pulse[0] <= mark <= self._zero_pulse[1] and self._zero_gap[0] <= space <= self._zero_gap[1]
+        if one and zero:
+            # overlapping windows, pick the nearest gap
+            one = abs(space - self._one_gap[2]) <= abs(space - self._zero_gap[2])
+            zero = not one
+        if one:
+            self._deviation(mark, self._one_pulse[2], True)
+            self._deviation(space, self._one_gap[2], False)
+            return 1
+        if zero:
+            self._deviation(mark, self._zero_pulse[2], True)
+            self._deviation(space, self._zero_gap[2], False)
+            return 0
+        return None
+
+    def feed(self, duration):
+        """process the next duration, return a PulseFrame if it completed one or None"""
+        is_mark = self._is_mark
+        self._is_mark = not is_mark
+        state = self._state
+        if state == self._BITS:
+            if is_mark:
+                if self._one_pulse[0] <= duration <= self._one_pulse[1] or (
+                    self._zero_pulse[0] <= duration <= self._zero_pulse[1]
+                ):
+                    self._mark = duration
+                    return None
+            else:
+                bit = self._bit(self._mark, duration)
+                if bit is not None:
+                    self._value = self._value << 1 | bit
+                    self._count += 1
+                    if self._count == self._header_bits and self._value != self._header:
+                        self._state = self._IDLE
+                    elif self._count == self._bits:
+                        self._state = self._TRAILING
+                    return None
+            # not a bit, this could be the leading pulse of another frame
+            state = self._state = self._IDLE
+        if state == self._IDLE:
+            if is_mark and self._leading_pulse[0] <= duration <= self._leading_pulse[1]:
+                self._state = self._LEADING_GAP
+                self._value = self._count = 0
+                self._mark_deviation = self._space_deviation = 0
+                self._mark_max = self._space_max = 0
+                self._marks = self._spaces = 0
+                self._deviation(duration, self._leading_pulse[2], True)
+        elif state == self._LEADING_GAP:
+            if self._leading_gap[0] <= duration <= self._leading_gap[1]:
+                self._state = self._BITS
+                self._deviation(duration, self._leading_gap[2], False)
+            else:
+                self._state = self._IDLE
+        elif state == self._TRAILING:
+            self._state = self._IDLE
+            if self._trailing_pulse[0] <= duration <= self._trailing_pulse[1]:
+                self._deviation(duration, self._trailing_pulse[2], True)
+                return self._frame()
+        return None
+
+    def _frame(self):
+        frame = self._value.to_bytes(self._bits // 8, "big")
+        try:
+            result = self.command_class.from_dump(frame, lsb=True)
+            error = None
+        except ValueError as exc:
+            result = None
+            error = str(exc)
+        jitter = {
+            "mark_mean": self._mark_deviation / self._marks,
+            "mark_max": self._mark_max,
+            "space_mean": self._space_deviation / self._spaces,
+            "space_max": self._space_max,
+        }
+        return PulseFrame(result, frame, error, jitter)
+
+
+def decode_pulses(command_class, durations, tolerance=0.25):
+    """decode alternating mark / space durations (any iterable, eg. an array or a numpy array)
+
+    Yield a PulseFrame for every frame found, see PulseDecoder.
+    """
+    if hasattr(durations, "tolist"):
+        # iterating over python integers is much faster than over numpy scalars
+        durations = durations.tolist()
+    decoder = PulseDecoder(command_class, tolerance)
+    feed = decoder.feed
+    for duration in durations:
+        frame = feed(duration)
+        if frame is not None:
+            yield frame
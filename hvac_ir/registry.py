@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Registry of the known protocols, indexed by frame length and header
+
+Command classes register themselves with the register() decorator when their module is imported. The
+modules listed in PROTOCOL_MODULES are only imported on the first lookup, so importing hvac_ir stays cheap.
+
+    command_class = detect(frame)
+    command_class, result = decode(frame)
+"""
+
+import importlib
+
+from .codec import REVERSED_BYTES
+
+# modules defining command classes, imported on first use
+PROTOCOL_MODULES = ["hvac_ir.mitsubishi"]
+
+# {(protocol bytes, header bytes): command class}
+_BY_HEADER = {}
+# {protocol bytes: (header lengths, ...)}
+_HEADER_LENGTHS = {}
+# {class name and model name (eg. "W001CP"): command class}
+_BY_NAME = {}
+_loaded = False
+
+
+def register(command_class):
+    """add command_class to the registry, can be used as a class decorator"""
+    key = (command_class.protocol_bytes, bytes(command_class.protocol_header))
+    if _BY_HEADER.get(key, command_class) is not command_class:
+        raise ValueError("%s has the same length and header as %s" % (command_class.__name__, _BY_HEADER[key].__name__))
+    _BY_HEADER[key] = command_class
+    lengths = _HEADER_LENGTHS.get(command_class.protocol_bytes, ())
+    if len(key[1]) not in lengths:
+        _HEADER_LENGTHS[command_class.protocol_bytes] = tuple(sorted(lengths + (len(key[1]),), reverse=True))
+    _BY_NAME[command_class.__name__] = command_class
+    _BY_NAME[command_class.__name__.rsplit("_", 1)[-1]] = command_class
+    return command_class
+
+
+def _load():
+    global _loaded
+    if not _loaded:
+        for module in PROTOCOL_MODULES:
+            importlib.import_module(module)
+        _loaded = True
+
+
+def protocols():
+    """return all the registered command classes"""
+    _load()
+    return tuple(_BY_HEADER.values())
+
+
+def get_protocol(name):
+    """return the command class with the given class name (eg. MitsubishiCommand_SG14D) or model (eg. SG14D)"""
+    _load()
+    try:
+        return _BY_NAME[name]
+    except KeyError:
+        raise ValueError("unknown protocol %s" % repr(name)) from None
+
+
+def detect(frame, lsb=False):
+    """return the command class of a packed frame (bytes, bytearray or memoryview), or None"""
+    _load()
+    for length in _HEADER_LENGTHS.get(len(frame), ()):
+        header = bytes(frame[0:length])
+        if lsb:
+            header = header.translate(REVERSED_BYTES)
+        command_class = _BY_HEADER.get((len(frame), header))
+        if command_class is not None:
+            return command_class
+    return None
+
+
+def decode(frame, lsb=False):
+    """return the command class and from_dump() result of a packed frame, raise ValueError if it is unknown"""
+    command_class = detect(frame, lsb)
+    if command_class is None:
+        raise ValueError("unknown frame of %d bytes" % len(frame))
+    return command_class, command_class.from_dump(frame, lsb)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Compact results of decoded frames
+
+from_dump(..., as_dict=False) returns a named tuple of the decoded fields instead of a dict, with the
+checksum status as a Checksum member: millions of them take a fraction of the memory of dicts.
+"""
+
+import collections
+import enum
+
+from .registry import get_protocol
+
+
+class Checksum(str, enum.Enum):
+    """checksum status of a decoded frame, equal to the strings used in from_dump() dicts"""
+
+    OK = "check_OK"
+    BAD = "check_BAD"
+    # frames repaired (or not) by from_dump(..., max_flips=N), see MitsubishiCommand_W001CP.repair()
+    CORRECTED = "check_CORRECTED"
+    UNCORRECTABLE = "check_UNCORRECTABLE"
+
+
+def result_type(module, protocol, names, parameters=None):
+    """return a named tuple type holding the decoded fields of protocol (a command class name) and checksum
+
+    The type must be stored as the Result attribute of the command class, defined in module, for pickle to
+    find it. parameters maps the fields whose name differs from the matching command constructor argument.
+    """
+    parameters = dict(parameters or {})
+    arguments = tuple(parameters.get(_, _) for _ in names)
+
+    class Result(collections.namedtuple("Result", tuple(names) + ("checksum",))):
+        __slots__ = ()
+
+        def to_command(self):
+            """return a command with the decoded parameters, without validating them"""
+            return get_protocol(protocol)(**dict(zip(arguments, self[:-1])))
+
+    Result.__module__ = module
+    Result.__qualname__ = protocol + ".Result"
+    return Result
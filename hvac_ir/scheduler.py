@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""asyncio scheduler of IR transmissions to many units through a few shared emitters
+
+Commands are submitted for a unit behind an emitter (eg. an IR blaster); only the newest pending command of
+each unit is kept, so a burst of setpoint changes ends up in a single transmission. Every emitter sends one
+pulse train at a time and waits for the whole train (protocol repeats and trailing gap included) before the
+next one. Pending units are served in submission order.
+
+    async def emit(emitter, unit, command, train):
+        await blasters[emitter].send(train)
+
+    scheduler = TransmitScheduler(emit)
+    scheduler.submit("living room", "unit 1", MitsubishiCommand_SG14D(temperature=24))
+    await scheduler.drain()
+"""
+
+import asyncio
+import collections
+import inspect
+import time
+
+# submitted: number of submit() calls
+# coalesced: number of pending commands replaced by a newer one before being sent
+# sent / errors: number of emit calls which succeeded / raised
+# queue_depth: number of units with a pending command
+# latency_*: seconds from the submission of a command to the end of its emit call
+_METRICS = ("submitted", "coalesced", "sent", "errors")
+
+
+class FakeEmitter(object):
+    """in-memory emit callable, recording (emitter, unit, command, pulse train, clock time) in sent"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.sent = []
+
+    async def __call__(self, emitter, unit, command, train):
+        self.sent.append((emitter, unit, command, train, self.clock()))
+
+
+class _Emitter(object):
+    __slots__ = ("pending", "wakeup", "idle", "task")
+
+    def __init__(self):
+        # {unit: (command, submission time)}, in submission order
+        self.pending = collections.OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task = None
+
+
+class TransmitScheduler(object):
+    """coalescing, paced transmitter of commands through emit(emitter, unit, command, pulse train)
+
+    emit can be a function or a coroutine function. Exceptions raised by encode_pulses() or emit are counted
+    in the metrics and kept in last_error, the command is dropped. clock must be monotonic and return seconds.
+    """
+
+    def __init__(self, emit, clock=time.monotonic, latency_window=1024):
+        self.emit = emit
+        self.clock = clock
+        self.last_error = None
+        self._emitters = {}
+        self._counters = dict.fromkeys(_METRICS, 0)
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._latency_max = 0.0
+
+    def submit(self, emitter, unit, command):
+        """queue command for unit behind emitter, replacing its pending command if any
+
+        Must be called from a running event loop, which runs the transmissions.
+        """
+        state = self._emitters.get(emitter)
+        if state is None:
+            state = self._emitters[emitter] = _Emitter()
+        self._counters["submitted"] += 1
+        if unit in state.pending:
+            # keep the place in the queue, send the newest command
+            self._counters["coalesced"] += 1
+        state.pending[unit] = (command, self.clock())
+        state.idle.clear()
+        state.wakeup.set()
+        if state.task is None or state.task.done():
+            state.task = asyncio.ensure_future(self._run(emitter, state))
+
+    def pending(self, emitter=None):
+        """return the number of units with a pending command, behind emitter or behind all emitters"""
+        if emitter is not None:
+            state = self._emitters.get(emitter)
+            return 0 if state is None else len(state.pending)
+        return sum(len(_.pending) for _ in self._emitters.values())
+
+    async def drain(self):
+        """wait until every pending command is sent and every emitter is done with its last pulse train"""
+        busy = [_ for _ in self._emitters.values() if not _.idle.is_set()]
+        while busy:
+            await busy[0].idle.wait()
+            # commands may have been submitted in the meantime
+            busy = [_ for _ in self._emitters.values() if not _.idle.is_set()]
+
+    async def close(self):
+        """stop all the emitters, dropping the pending commands"""
+        tasks = [_.task for _ in self._emitters.values() if _.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._emitters.clear()
+
+    def metrics(self):
+        """return a dict of counters, queue depth and latency statistics (see _METRICS)"""
+        metrics = dict(self._counters)
+        metrics["queue_depth"] = self.pending()
+        latencies = self._latencies
+        metrics["latency_last"] = latencies[-1] if latencies else None
+        metrics["latency_mean"] = sum(latencies) / len(latencies) if latencies else None
+        metrics["latency_max"] = self._latency_max if latencies else None
+        return metrics
+
+    async def _run(self, emitter, state):
+        try:
+            while True:
+                if not state.pending:
+                    state.idle.set()
+                    state.wakeup.clear()
+                    await state.wakeup.wait()
+                    continue
+                unit, (command, submitted) = state.pending.popitem(last=False)
+                started = self.clock()
+                train = ()
+                try:
+                    train = command.encode_pulses()
+                    result = self.emit(emitter, unit, command, train)
+                    if inspect.isawaitable(result):
+                        await result
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self._counters["errors"] += 1
+                    self.last_error = exc
+                else:
+                    self._counters["sent"] += 1
+                    latency = self.clock() - submitted
+                    self._latencies.append(latency)
+                    self._latency_max = max(self._latency_max, latency)
+                # the emitter is busy until the end of the train (microseconds), trailing gap included
+                delay = started + sum(train) / 1e6 - self.clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            state.idle.set()
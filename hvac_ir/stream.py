@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Streaming decoder of endless captures of mark / space durations
+
+decode_stream() takes an iterable of chunks of durations of any size (eg. from read_mode2() or
+read_binary() on a file, a pipe or a socket) and runs one PulseDecoder per protocol over them, so every
+frame is yielded as soon as its trailing pulse is received. Only the state of the decoders is kept across
+chunks: memory stays constant whatever the length of the stream.
+
+    with open("/dev/lirc0.mode2") as fh:
+        for command_class, frame in decode_stream(read_mode2(fh)):
+            print(command_class.__name__, frame.result)
+"""
+
+import array
+
+from .pulses import PulseDecoder
+from .registry import protocols
+
+
+def decode_stream(chunks, command_classes=None, tolerance=0.25):
+    """yield (command class, PulseFrame) tuples for every frame found in chunks of durations
+
+    Durations alternate marks and spaces, starting with a mark, across chunk boundaries. Frames of all the
+    registered protocols are decoded unless command_classes is given.
+    """
+    if command_classes is None:
+        command_classes = protocols()
+    feeds = tuple((_, PulseDecoder(_, tolerance).feed) for _ in command_classes)
+    for chunk in chunks:
+        if hasattr(chunk, "tolist"):
+            chunk = chunk.tolist()
+        for duration in chunk:
+            for command_class, feed in feeds:
+                frame = feed(duration)
+                if frame is not None:
+                    yield command_class, frame
+
+
+def read_mode2(fileobj, chunk_size=65536):
+    """yield arrays of durations read from a LIRC mode2 text stream
+
+    Lines are "pulse N", "space N" or "timeout N" (a space); consecutive lines of the same kind are merged,
+    so the durations always alternate marks and spaces, and the stream is started on the first mark.
+    """
+    partial = ""
+    kind = None  # kind (True for marks) and duration not yet returned
+    pending = 0
+    while True:
+        text = fileobj.read(chunk_size)
+        if isinstance(text, bytes):
+            text = text.decode("ascii")
+        lines = (partial + text).split("\n")
+        # keep the last line, which may be incomplete, unless the stream is over
+        partial = lines.pop() if text else ""
+        durations = array.array("I")
+        for line in lines:
+            words = line.split()
+            if len(words) != 2 or words[0] not in ("pulse", "space", "timeout"):
+                continue
+            is_mark = words[0] == "pulse"
+            if kind is None and not is_mark:
+                continue
+            if is_mark == kind:
+                pending += int(words[1])
+                continue
+            if kind is not None:
+                durations.append(pending)
+            kind = is_mark
+            pending = int(words[1])
+        if not text:
+            if kind is not None:
+                durations.append(pending)
+            if durations:
+                yield durations
+            return
+        if durations:
+            yield durations
+
+
+def read_binary(fileobj, chunk_size=65536):
+    """yield arrays of durations read from a stream of alternating native-endian 32 bits unsigned integers"""
+    itemsize = array.array("I").itemsize
+    partial = b""
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            return
+        data = partial + data
+        cut = len(data) - len(data) % itemsize
+        partial = data[cut:]
+        durations = array.array("I")
+        durations.frombytes(data[:cut])
+        yield durations
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Modulated sample buffers, for emitters driven by an audio DAC or a DMA'd GPIO (requires numpy)
+
+A waveform is the pulse train of a frame (see hvac_ir.pulses) sampled at sample_rate: marks are the carrier
+given by the frequency and duty_cycle of pyslinger_protocol_config, spaces are idle. The carrier runs freely
+from the first sample: its pattern over the shortest whole number of samples holding a whole number of
+periods is computed once and tiled, so every mark starts at the right carrier phase even when the sample
+rate is not a multiple of the frequency. The sample rate must give at least MIN_SAMPLES_PER_PERIOD samples
+per carrier period (eg. 152 kHz for a 38 kHz carrier), lower rates only produce an alias of the carrier.
+
+Levels depend on dtype: uint8 samples are 255 (carrier on) and 0 (carrier off, spaces), int16 samples swing
+between 32767 and -32767 around the 0 of spaces, as audio outputs do not hold a DC level.
+
+    frame = MitsubishiCommand_W001CP(power=True).encode_bytes(lsb=True)
+    samples = waveform(MitsubishiCommand_W001CP, frame, sample_rate=192000, dtype="int16")
+"""
+
+import math
+
+from .cache import EncodeCache
+from .pulses import pulse_train
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+# lowest number of samples per carrier period, enough to render the duty cycle
+MIN_SAMPLES_PER_PERIOD = 4
+
+# dtype: (carrier on, carrier off, space)
+LEVELS = {
+    "uint8": (255, 0, 0),
+    "int16": (32767, -32767, 0),
+}
+
+# {(command class, sample rate, dtype): carrier pattern}
+_CARRIERS = {}
+# read-only waveforms, keyed by (command class, frame, sample rate, dtype)
+waveform_cache = EncodeCache(maxsize=64)
+
+
+def _carrier(command_class, sample_rate, dtype):
+    key = (command_class, sample_rate, dtype)
+    try:
+        return _CARRIERS[key]
+    except KeyError:
+        pass
+    config = command_class.pyslinger_protocol_config
+    frequency = config["frequency"]
+    # sample_rate / gcd samples hold exactly frequency / gcd periods
+    length = sample_rate // math.gcd(sample_rate, frequency)
+    phase = numpy.arange(length, dtype=numpy.int64) * frequency % sample_rate / sample_rate
+    on, off, _ = LEVELS[dtype]
+    pattern = numpy.where(phase < config["duty_cycle"], on, off).astype(dtype)
+    _CARRIERS[key] = pattern
+    return pattern
+
+
+def waveform(command_class, frame, sample_rate=192000, dtype="uint8", out=None):
+    """return the samples of a frame in wire order (eg. encode_bytes(lsb=True)), with protocol repeats
+
+    Waveforms are cached and returned read-only; if out (a 1-D array of dtype) is given, the samples are
+    copied to its beginning instead and the view of out holding them is returned.
+    """
+    if numpy is None:
+        raise RuntimeError("waveform synthesis requires numpy")
+    if dtype not in LEVELS:
+        raise ValueError("dtype must be one of %s, not %s" % (", ".join(sorted(LEVELS)), repr(dtype)))
+    if not isinstance(sample_rate, int) or sample_rate <= 0:
+        raise ValueError("sample rate must be a positive integer, not %s" % repr(sample_rate))
+    frequency = command_class.pyslinger_protocol_config["frequency"]
+    if sample_rate < MIN_SAMPLES_PER_PERIOD * frequency:
+        raise ValueError(
+            "sample rate %d Hz is below %d samples per period of the %d Hz carrier"
+            % (sample_rate, MIN_SAMPLES_PER_PERIOD, frequency)
+        )
+    key = (command_class, bytes(frame), sample_rate, dtype)
+    samples = waveform_cache.get(key)
+    if samples is None:
+        samples = _synthesize(command_class, key[1], sample_rate, dtype)
+        waveform_cache.put(key, samples)
+    if out is None:
+        return samples
+    if out.dtype != samples.dtype or out.ndim != 1 or len(out) < len(samples):
+        raise ValueError("out must be a 1-D %s array of at least %d samples" % (dtype, len(samples)))
+    view = out[: len(samples)]
+    numpy.copyto(view, samples)
+    return view
+
+
+def _synthesize(command_class, frame, sample_rate, dtype):
+    train = numpy.frombuffer(pulse_train(command_class, frame), dtype=numpy.uint32)
+    # sample of the end of every mark and space, rounded so that errors do not add up
+    edges = (numpy.cumsum(train, dtype=numpy.int64) * sample_rate + 500000) // 1000000
+    counts = numpy.diff(edges, prepend=0)
+    is_mark = numpy.tile(numpy.array((True, False)), len(train) // 2)
+    marks = numpy.repeat(is_mark, counts)
+    carrier = numpy.resize(_carrier(command_class, sample_rate, dtype), len(marks))
+    samples = numpy.where(marks, carrier, numpy.array(LEVELS[dtype][2], dtype=dtype))
+    samples.flags.writeable = False
+    return samples
@@ -27,4 +27,10 @@ setup(
     ],
     packages=find_packages(),
     python_requires='>=3.7',
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': ['hvac-ir=hvac_ir.cli:main'],
+    },
 )
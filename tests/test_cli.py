@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from hvac_ir.cli import main
+from hvac_ir.mitsubishi import MitsubishiCommand_SG14D, MitsubishiCommand_W001CP
+
+
+def _states(command_class, count):
+    rnd = random.Random(count)
+    parameters = command_class.protocol_parameters
+    return [{name: rnd.choice(values) for name, values in parameters.items()} for _ in range(count)]
+
+
+def _write_states(path, states):
+    path.write_text("".join(json.dumps(_) + "\n" for _ in states))
+
+
+def _read_records(path):
+    return [json.loads(_) for _ in path.read_text().splitlines()]
+
+
+@pytest.mark.parametrize("command_class", [MitsubishiCommand_W001CP, MitsubishiCommand_SG14D])
+@pytest.mark.parametrize("output_format, input_format", [("bits", "bits"), ("packed", "packed"), ("mode2", "mode2")])
+def test_round_trip(tmp_path, command_class, output_format, input_format):
+    protocol = command_class.__name__
+    states = _states(command_class, 25)
+    _write_states(tmp_path / "states.jsonl", states)
+    encoded = tmp_path / "encoded"
+    options = ["-p", protocol, "-j", "2", "--chunk-size", "4", "--time", "12:34"]
+    main(["encode", "--output-format", output_format, str(tmp_path / "states.jsonl"), "-o", str(encoded)] + options)
+    decoded = tmp_path / "decoded.jsonl"
+    options = ["-p", protocol] if input_format == "packed" else []
+    main(["decode", "-f", input_format, "-j", "2", "--chunk-size", "3", str(encoded), "-o", str(decoded)] + options)
+    records = _read_records(decoded)
+    # every frame of a pulse train is decoded
+    repeats = command_class.protocol_repeats if input_format == "mode2" else 1
+    assert [_["index"] for _ in records] == list(range(len(states) * repeats))
+    for index, record in enumerate(records):
+        state = states[index // repeats]
+        assert record["protocol"] == protocol.rsplit("_", 1)[-1]
+        assert record["checksum"] == "check_OK"
+        assert {name: record[name] for name in state} == state
+
+
+def test_columns(tmp_path):
+    states = _states(MitsubishiCommand_SG14D, 10)
+    _write_states(tmp_path / "states.jsonl", states)
+    main(["encode", "-p", "SG14D", "--time", "12:34", str(tmp_path / "states.jsonl"), "-o", str(tmp_path / "bits")])
+    jsonl = tmp_path / "frames.jsonl"
+    columns = tmp_path / "columns.jsonl"
+    main(["decode", "--chunk-size", "4", str(tmp_path / "bits"), "-o", str(jsonl)])
+    main(["decode", "--chunk-size", "4", "--output-format", "columns", str(tmp_path / "bits"), "-o", str(columns)])
+    chunks = _read_records(columns)
+    # one object of columns per chunk
+    assert [len(_["index"]) for _ in chunks] == [4, 4, 2]
+    records = [dict(zip(chunk, values)) for chunk in chunks for values in zip(*chunk.values())]
+    assert records == _read_records(jsonl)
+
+
+def test_partial_packed_frame(tmp_path, capsys):
+    _write_states(tmp_path / "states.jsonl", _states(MitsubishiCommand_W001CP, 5))
+    packed = tmp_path / "packed"
+    main(["encode", "-p", "W001CP", "--output-format", "packed", str(tmp_path / "states.jsonl"), "-o", str(packed)])
+    packed.write_bytes(packed.read_bytes()[:-3])
+    decoded = tmp_path / "decoded.jsonl"
+    with pytest.raises(SystemExit) as exc_info:
+        main(["decode", "-f", "packed", "-p", "W001CP", "-j", "2", "--chunk-size", "2", str(packed), "-o", str(decoded)])
+    assert "partial frame of 14 bytes" in str(exc_info.value)
+    # the whole frames before it are decoded
+    assert [_["index"] for _ in _read_records(decoded)] == [0, 1, 2, 3]
+
+
+def test_packed_output_protocol(tmp_path, capsys):
+    states = [{"power": True}, {"protocol": "W001CP", "power": True}, {"power": False}]
+    _write_states(tmp_path / "states.jsonl", states)
+    packed = tmp_path / "packed"
+    main(["encode", "-p", "SG14D", "--output-format", "packed", str(tmp_path / "states.jsonl"), "-o", str(packed)])
+    assert len(packed.read_bytes()) == 2 * MitsubishiCommand_SG14D.protocol_bytes
+    assert "state 2: packed output holds SG14D frames only, not W001CP" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["encode", "--output-format", "packed", str(tmp_path / "states.jsonl"), "-o", str(packed)])
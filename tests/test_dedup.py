@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+from hvac_ir.dedup import DedupDecoder
+from hvac_ir.mitsubishi import MitsubishiCommand_SG14D, MitsubishiCommand_W001CP
+
+
+def _frames():
+    return [MitsubishiCommand_W001CP(power=True, temperature=16 + _).encode_bytes(lsb=True) for _ in range(4)]
+
+
+def test_repeats():
+    frame = _frames()[0]
+    decoder = DedupDecoder(window=1.0, lsb=True)
+    first = decoder.decode(frame, now=10.0)
+    assert first.command_class is MitsubishiCommand_W001CP
+    assert first.result == MitsubishiCommand_W001CP.from_dump(frame, lsb=True)
+    assert not first.repeat
+    # within the window of the previous copy, which slides with every copy
+    assert decoder.decode(frame, now=10.5).repeat
+    assert decoder.decode(frame, now=11.5).repeat
+    # outside of it
+    assert not decoder.decode(frame, now=13.0).repeat
+    assert decoder.stats() == {"hits": 3, "misses": 1, "repeats": 2, "evictions": 0, "size": 1, "maxsize": 256}
+
+
+def test_results_are_copies():
+    frame = _frames()[0]
+    decoder = DedupDecoder(lsb=True)
+    decoder.decode(frame, now=0.0).result["power"] = False
+    assert decoder.decode(frame, now=0.0).result["power"] is True
+
+
+def test_lru_eviction():
+    frames = _frames()
+    decoder = DedupDecoder(window=1.0, maxsize=2, lsb=True)
+    decoder.decode(frames[0], now=0.0)
+    decoder.decode(frames[1], now=0.0)
+    # frames[0] is now the most recently used, frames[1] is evicted
+    decoder.decode(frames[0], now=0.0)
+    decoder.decode(frames[2], now=0.0)
+    assert len(decoder) == 2
+    assert decoder.stats()["evictions"] == 1
+    assert not decoder.decode(frames[1], now=0.5).repeat
+    assert decoder.decode(frames[2], now=0.5).repeat
+    stats = decoder.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 4, 2)
+    decoder.clear()
+    assert len(decoder) == 0 and decoder.stats()["misses"] == 0
+
+
+def test_invalid_frames():
+    decoder = DedupDecoder(lsb=True)
+    with pytest.raises(ValueError):
+        decoder.decode(bytes(17))
+    assert len(decoder) == 0
+    frame = MitsubishiCommand_SG14D(power=True).encode_bytes(lsb=True, time_of_day=datetime.time(12, 0))
+    assert decoder.decode(frame).command_class is MitsubishiCommand_SG14D
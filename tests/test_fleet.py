@@ -0,0 +1,98 @@
+import datetime
+import random
+
+import pytest
+
+from hvac_ir import fleet
+from hvac_ir.fleet import Fleet
+from hvac_ir.mitsubishi import MitsubishiCommand_SG14D, MitsubishiCommand_W001CP
+
+MORNING = datetime.time(9, 5)
+LATER = datetime.time(9, 15)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def columns(request, monkeypatch):
+    """run with the numpy and the pure python comparisons of columns"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(fleet, "numpy", None)
+    return request.param
+
+
+def _state(command):
+    return {name: getattr(command, name) for name in command.protocol_parameters}
+
+
+def _random_state(command_class, rnd):
+    return {name: rnd.choice(values) for name, values in command_class.protocol_parameters.items()}
+
+
+def _scenario(command_class):
+    """return a fleet and the per-command model of it: {unit: desired state}, {unit: (sent state, time)}"""
+    rnd = random.Random(command_class.__name__)
+    units = ["unit %d" % _ for _ in range(40)]
+    fleet_ = Fleet(command_class, units)
+    desired = {unit: _state(command_class()) for unit in units}
+    sent = {}
+    for round_, time_of_day in enumerate((MORNING, MORNING, LATER)):
+        for unit in rnd.sample(units, 15):
+            values = _random_state(command_class, rnd)
+            if round_ == 1:
+                # same state as already desired, not a change
+                values = dict(desired[unit])
+            fleet_.set(unit, **values)
+            desired[unit] = values
+        marked = rnd.sample(units, 10)
+        fleet_.mark_sent(marked, time_of_day)
+        for unit in marked:
+            sent[unit] = (dict(desired[unit]), time_of_day)
+    return fleet_, desired, sent
+
+
+def _frame(command_class, state, time_of_day):
+    options = {"time_of_day": time_of_day} if command_class is MitsubishiCommand_SG14D else {}
+    return command_class(**state).encode_bytes(True, **options)
+
+
+@pytest.mark.parametrize("command_class", [MitsubishiCommand_W001CP, MitsubishiCommand_SG14D])
+def test_changed_and_stale(command_class, columns):
+    fleet_, desired, sent = _scenario(command_class)
+    changed = [unit for unit in fleet_.units if unit not in sent or sent[unit][0] != desired[unit]]
+    assert fleet_.changed() == changed
+    for unit in fleet_.units:
+        assert fleet_.desired(unit) == desired[unit]
+        assert fleet_.sent(unit) == (sent[unit][0] if unit in sent else None)
+    for time_of_day in (MORNING, LATER):
+        if command_class is MitsubishiCommand_SG14D:
+            stale = [unit for unit in fleet_.units if unit in sent and sent[unit][1] != time_of_day]
+        else:
+            stale = []
+        assert fleet_.stale(time_of_day) == stale
+        frames = fleet_.encode_changed(time_of_day=time_of_day, stale=True)
+        units = sorted(set(changed) | set(stale), key=fleet_.units.index)
+        assert frames == [(unit, _frame(command_class, desired[unit], time_of_day)) for unit in units]
+
+
+@pytest.mark.parametrize("command_class", [MitsubishiCommand_W001CP, MitsubishiCommand_SG14D])
+def test_encode_changed_batch(command_class):
+    pytest.importorskip("numpy")
+    fleet_ = _scenario(command_class)[0]
+    for stale in (False, True):
+        frames = fleet_.encode_changed(time_of_day=LATER, stale=stale)
+        units, batch = fleet_.encode_changed(time_of_day=LATER, stale=stale, batch=True)
+        assert units == [_[0] for _ in frames]
+        assert [bytes(_) for _ in batch] == [_[1] for _ in frames]
+
+
+def test_set():
+    fleet_ = Fleet(MitsubishiCommand_W001CP)
+    fleet_.set("unit", MitsubishiCommand_W001CP(power=True, fan=3), temperature=20)
+    assert fleet_.desired("unit") == _state(MitsubishiCommand_W001CP(power=True, fan=3, temperature=20))
+    with pytest.raises(ValueError):
+        fleet_.set("unit", temperature=40)
+    with pytest.raises(ValueError):
+        fleet_.set("unit", clock=None)
+    # rejected values leave the desired state untouched
+    assert fleet_.desired("unit")["temperature"] == 20
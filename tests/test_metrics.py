@@ -0,0 +1,80 @@
+import re
+
+import pytest
+
+from hvac_ir import metrics
+from hvac_ir.mitsubishi import MitsubishiCommand_W001CP
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable([MitsubishiCommand_W001CP])
+    try:
+        yield metrics
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+
+def test_enable_disable():
+    encode_bytes = MitsubishiCommand_W001CP.__dict__["encode_bytes"]
+    from_dump = MitsubishiCommand_W001CP.__dict__["from_dump"]
+    metrics.enable()
+    try:
+        assert metrics.enabled()
+        assert MitsubishiCommand_W001CP.__dict__["encode_bytes"] is not encode_bytes
+        # enabling twice does not wrap twice
+        metrics.enable([MitsubishiCommand_W001CP])
+        assert MitsubishiCommand_W001CP.__dict__["encode_bytes"].__wrapped__ is encode_bytes
+    finally:
+        metrics.disable()
+    assert not metrics.enabled()
+    assert MitsubishiCommand_W001CP.__dict__["encode_bytes"] is encode_bytes
+    assert MitsubishiCommand_W001CP.__dict__["from_dump"] is from_dump
+    # collection stops, counters are kept
+    encodes = metrics.snapshot()["W001CP"]["encodes"]
+    MitsubishiCommand_W001CP(power=True).encode_bytes()
+    assert metrics.snapshot()["W001CP"]["encodes"] == encodes
+
+
+def test_counters(enabled):
+    frame = MitsubishiCommand_W001CP(power=True).encode_bytes(lsb=False)
+    MitsubishiCommand_W001CP.from_dump(frame)
+    bad_checksum = frame[:16] + bytes((frame[16] ^ 1,))
+    assert MitsubishiCommand_W001CP.from_dump(bad_checksum)["checksum"] == "check_BAD"
+    bad_header = bytes((frame[0] ^ 1,)) + frame[1:]
+    # low nibble of byte 6: HVAC mode 0b0100 does not exist
+    bad_field = frame[:6] + bytes((frame[6] & 0xF0 | 0b0100,)) + frame[7:]
+    for dump in (bad_header, bad_field, frame[:16]):
+        with pytest.raises(ValueError):
+            MitsubishiCommand_W001CP.from_dump(dump)
+    with pytest.raises(ValueError):
+        MitsubishiCommand_W001CP(temperature=40).encode_bytes()
+    snapshot = metrics.snapshot()["W001CP"]
+    assert (snapshot["encodes"], snapshot["decodes"]) == (2, 5)
+    assert snapshot["checksum_failures"] == 1
+    assert snapshot["header_mismatches"] == 1
+    assert snapshot["invalid_fields"] == {"hvac_mode": 1, "temperature": 1}
+    assert snapshot["malformed"] == 1
+    assert snapshot["encode_latency"]["count"] == 2
+
+
+def test_prometheus_histogram(enabled, monkeypatch):
+    # encode latencies of 3 us, 3 us, 200 us and 1 s
+    times = iter([0.0, 3e-6, 0.0, 3e-6, 0.0, 2e-4, 0.0, 1.0])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(times))
+    command = MitsubishiCommand_W001CP(power=True)
+    for _ in range(4):
+        command.encode_bytes()
+    monkeypatch.undo()
+    text = metrics.prometheus_text()
+    pattern = r'hvac_ir_encode_seconds_bucket\{protocol="W001CP",le="([^"]+)"\} (\d+)'
+    buckets = {le: int(count) for le, count in re.findall(pattern, text)}
+    assert list(buckets) == [repr(_) for _ in metrics.BUCKETS] + ["+Inf"]
+    # cumulative counts
+    assert (buckets["2.5e-06"], buckets["5e-06"], buckets["0.00025"], buckets["0.01"], buckets["+Inf"]) == (0, 2, 3, 3, 4)
+    counts = list(buckets.values())
+    assert counts == sorted(counts)
+    assert 'hvac_ir_encode_seconds_count{protocol="W001CP"} 4' in text
+    assert 'hvac_ir_encodes_total{protocol="W001CP"} 4' in text
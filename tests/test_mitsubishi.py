@@ -0,0 +1,75 @@
+import pytest
+
+from hvac_ir.mitsubishi import MitsubishiCommand_W001CP
+
+
+def _frame(**values):
+    command = MitsubishiCommand_W001CP(power=True, hvac_mode="heat", temperature=22, fan=2, vane=1, **values)
+    return bytearray(command.encode_bytes(lsb=False))
+
+
+def _flip(frame, byte, mask):
+    frame = bytearray(frame)
+    frame[byte] ^= mask
+    return frame
+
+
+def test_valid_frame():
+    result = MitsubishiCommand_W001CP.from_dump(_frame(), max_flips=2)
+    assert result["checksum"] == "check_OK"
+
+
+def test_complement_bit():
+    expected = MitsubishiCommand_W001CP.from_dump(_frame())
+    # byte 11 is the complement of the power byte, whose bit 6 is the power status (see test_ambiguous_bit)
+    for bit in (0, 1, 2, 3, 4, 5, 7):
+        frame = _flip(_frame(), 11, 1 << bit)
+        assert MitsubishiCommand_W001CP.from_dump(frame)["checksum"] == "check_BAD"
+        result = MitsubishiCommand_W001CP.from_dump(frame, max_flips=1)
+        assert result == dict(expected, checksum="check_CORRECTED")
+        assert MitsubishiCommand_W001CP.repair(frame, 1) == (bytes(_frame()), 1)
+
+
+def test_data_bit():
+    expected = MitsubishiCommand_W001CP.from_dump(_frame())
+    result = MitsubishiCommand_W001CP.from_dump(_flip(_frame(), 5, 0b00000001), max_flips=1)
+    assert result == dict(expected, checksum="check_CORRECTED")
+
+
+def test_header_bit():
+    expected = MitsubishiCommand_W001CP.from_dump(_frame())
+    frame = _flip(_frame(), 3, 0b00000100)
+    with pytest.raises(ValueError):
+        MitsubishiCommand_W001CP.from_dump(frame)
+    assert MitsubishiCommand_W001CP.from_dump(frame, max_flips=1) == dict(expected, checksum="check_CORRECTED")
+
+
+@pytest.mark.parametrize(
+    "byte, mask",
+    [
+        # power status, on and off are both valid
+        (11, 0b01000000),
+        # temperature nibble, both 22 and 23 are valid
+        (6, 0b00010000),
+        (12, 0b00010000),
+        # timer bytes, every value is valid
+        (9, 0b00000001),
+        (16, 0b10000000),
+    ],
+)
+def test_ambiguous_bit(byte, mask):
+    frame = _flip(_frame(), byte, mask)
+    with pytest.raises(ValueError):
+        MitsubishiCommand_W001CP.repair(frame, 2)
+    assert MitsubishiCommand_W001CP.from_dump(frame, max_flips=2)["checksum"] == "check_UNCORRECTABLE"
+
+
+def test_max_flips():
+    frame = _flip(_frame(), 11, 0b00000011)
+    assert MitsubishiCommand_W001CP.from_dump(frame, max_flips=2)["checksum"] == "check_CORRECTED"
+    assert MitsubishiCommand_W001CP.from_dump(frame, max_flips=1)["checksum"] == "check_UNCORRECTABLE"
+    # header and complement flips add up
+    frame = _flip(_flip(_frame(), 0, 0b10000000), 11, 0b00000001)
+    assert MitsubishiCommand_W001CP.from_dump(frame, max_flips=2)["checksum"] == "check_CORRECTED"
+    with pytest.raises(ValueError):
+        MitsubishiCommand_W001CP.repair(frame, 1)
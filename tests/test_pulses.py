@@ -0,0 +1,56 @@
+import array
+import random
+
+from hvac_ir.mitsubishi import MitsubishiCommand_SG14D, MitsubishiCommand_W001CP
+from hvac_ir.pulses import decode_pulses
+
+
+def _commands():
+    yield MitsubishiCommand_W001CP(power=True, hvac_mode="heat", temperature=22, fan=3, vane=2)
+    yield MitsubishiCommand_W001CP(hvac_mode="dry", temperature=31, fan=4)
+    yield MitsubishiCommand_SG14D(power=True, hvac_mode="cold", temperature=19, fan="quiet", vane="move")
+    yield MitsubishiCommand_SG14D(isee=True, hvac_mode="fan", fan=2, econocool=True)
+
+
+def _jittered(train, rnd):
+    return [int(_ * rnd.uniform(0.9, 1.1)) for _ in train]
+
+
+def _noise(rnd):
+    # marks and spaces shorter than any leading pulse, starting with a mark and ending with a space
+    return [rnd.randint(50, 1500) for _ in range(2 * rnd.randint(0, 20))]
+
+
+def test_jitter_and_noise():
+    rnd = random.Random(1)
+    for command_class in (MitsubishiCommand_W001CP, MitsubishiCommand_SG14D):
+        durations = []
+        expected = []
+        for command in _commands():
+            if isinstance(command, command_class):
+                durations += _noise(rnd) + _jittered(command.encode_pulses(), rnd)
+                frame = command.encode_bytes(lsb=True)
+                expected += [(frame, command_class.from_dump(frame, lsb=True))] * command_class.protocol_repeats
+        durations += _noise(rnd)
+        frames = list(decode_pulses(command_class, array.array("I", durations)))
+        assert [(_.frame, _.result) for _ in frames] == expected
+        for frame in frames:
+            assert frame.error is None
+            assert 0 < frame.jitter["mark_max"] and 0 < frame.jitter["space_max"]
+
+
+def test_other_protocol_header():
+    # the headers differ in byte 3 only
+    w001cp = MitsubishiCommand_W001CP(power=True).encode_pulses()
+    sg14d = MitsubishiCommand_SG14D(power=True).encode_pulses()
+    assert list(decode_pulses(MitsubishiCommand_W001CP, sg14d)) == []
+    assert list(decode_pulses(MitsubishiCommand_SG14D, w001cp)) == []
+    # the decoder resyncs on the next frame
+    frames = list(decode_pulses(MitsubishiCommand_W001CP, sg14d + w001cp))
+    assert [_.frame for _ in frames] == [MitsubishiCommand_W001CP(power=True).encode_bytes(lsb=True)]
+
+
+def test_truncated_frame():
+    train = MitsubishiCommand_W001CP(power=True).encode_pulses()
+    frames = list(decode_pulses(MitsubishiCommand_W001CP, train[:100] + train))
+    assert len(frames) == 1 and frames[0].result["power"] is True
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from hvac_ir import scheduler
+from hvac_ir.mitsubishi import MitsubishiCommand_W001CP
+from hvac_ir.scheduler import FakeEmitter, TransmitScheduler
+
+
+class _Clock(object):
+    """clock advanced by asyncio.sleep() only, so that pacing does not take real time"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, result=None):
+        clock.now += delay
+        return await sleep(0, result)
+
+    monkeypatch.setattr(scheduler.asyncio, "sleep", fake_sleep)
+    return clock
+
+
+def test_coalescing(clock):
+    emit = FakeEmitter(clock)
+    transmitter = TransmitScheduler(emit, clock)
+    commands = [MitsubishiCommand_W001CP(power=True, temperature=16 + _) for _ in range(10)]
+
+    async def main():
+        for command in commands:
+            transmitter.submit("blaster", "unit 1", command)
+        assert transmitter.pending() == 1
+        await transmitter.drain()
+
+    asyncio.run(main())
+    assert [(_[0], _[1], _[2]) for _ in emit.sent] == [("blaster", "unit 1", commands[-1])]
+    assert list(emit.sent[0][3]) == list(commands[-1].encode_pulses())
+    metrics = transmitter.metrics()
+    assert (metrics["submitted"], metrics["coalesced"], metrics["sent"], metrics["errors"]) == (10, 9, 1, 0)
+    assert metrics["queue_depth"] == 0
+    assert metrics["latency_last"] == metrics["latency_max"] == 0.0
+
+
+def test_pacing(clock):
+    emit = FakeEmitter(clock)
+    transmitter = TransmitScheduler(emit, clock)
+    first = MitsubishiCommand_W001CP(power=True)
+    second = MitsubishiCommand_W001CP(power=False)
+
+    async def main():
+        transmitter.submit("blaster 1", "unit 1", first)
+        transmitter.submit("blaster 1", "unit 2", second)
+        await transmitter.drain()
+        await transmitter.close()
+
+    asyncio.run(main())
+    times = {unit: time for _, unit, _, _, time in emit.sent}
+    # the second unit waits for the whole train of the first one, trailing gap included
+    assert times["unit 2"] - times["unit 1"] == pytest.approx(sum(first.encode_pulses()) / 1e6)
+    metrics = transmitter.metrics()
+    assert metrics["sent"] == 2
+    assert metrics["latency_max"] == pytest.approx(sum(first.encode_pulses()) / 1e6)
+
+
+def test_errors(clock):
+    error = RuntimeError("blaster offline")
+    sent = []
+
+    def emit(emitter, unit, command, train):
+        if unit == "unit 1":
+            raise error
+        sent.append(unit)
+
+    transmitter = TransmitScheduler(emit, clock)
+
+    async def main():
+        transmitter.submit("blaster", "unit 1", MitsubishiCommand_W001CP(power=True))
+        transmitter.submit("blaster", "unit 2", MitsubishiCommand_W001CP(power=True))
+        await transmitter.drain()
+
+    asyncio.run(main())
+    # the failed command is dropped, the next one is still sent
+    assert sent == ["unit 2"]
+    assert transmitter.last_error is error
+    metrics = transmitter.metrics()
+    assert (metrics["sent"], metrics["errors"]) == (1, 1)
@@ -0,0 +1,72 @@
+import array
+import datetime
+import io
+import random
+
+from hvac_ir.mitsubishi import MitsubishiCommand_SG14D, MitsubishiCommand_W001CP
+from hvac_ir.stream import decode_stream, read_binary, read_mode2
+
+
+def _durations():
+    commands = (
+        MitsubishiCommand_W001CP(power=True, temperature=21),
+        MitsubishiCommand_SG14D(power=True, hvac_mode="heat", clock=lambda: datetime.datetime(2020, 1, 1, 15, 53)),
+        MitsubishiCommand_W001CP(hvac_mode="cold", fan=2),
+    )
+    durations = array.array("I")
+    expected = []
+    for command in commands:
+        frame = command.encode_bytes(lsb=True)
+        durations += command.encode_pulses()
+        expected += [(type(command), frame)] * type(command).protocol_repeats
+    return durations, expected
+
+
+def _split(durations, rnd):
+    """return durations as chunks of random sizes"""
+    chunks = []
+    start = 0
+    while start < len(durations):
+        end = start + rnd.randint(1, 200)
+        chunks.append(durations[start:end])
+        start = end
+    return chunks
+
+
+def test_chunk_boundaries():
+    durations, expected = _durations()
+    rnd = random.Random(2)
+    for _ in range(20):
+        found = list(decode_stream(_split(durations, rnd)))
+        assert [(command_class, frame.frame) for command_class, frame in found] == expected
+        assert all(frame.error is None for _, frame in found)
+
+
+def test_other_protocol_header():
+    durations, expected = _durations()
+    found = list(decode_stream([durations], [MitsubishiCommand_W001CP]))
+    assert [(command_class, frame.frame) for command_class, frame in found] == [
+        _ for _ in expected if _[0] is MitsubishiCommand_W001CP
+    ]
+
+
+def test_read_mode2_merges():
+    text = "space 5000\npulse 100\npulse 200\nspace 300\ntimeout 400\nspace 500\npulse 600\nbogus\npulse 700\n"
+    # every split of the text across reads gives the same durations
+    for chunk_size in (1, 7, 1000):
+        durations = [_ for chunk in read_mode2(io.StringIO(text), chunk_size) for _ in chunk]
+        assert durations == [300, 1200, 1300]
+    assert [_ for chunk in read_mode2(io.BytesIO(text.encode())) for _ in chunk] == [300, 1200, 1300]
+
+
+def test_read_mode2_round_trip():
+    durations, expected = _durations()
+    text = "".join("%s %d\n" % ("space" if index % 2 else "pulse", _) for index, _ in enumerate(durations))
+    found = list(decode_stream(read_mode2(io.StringIO(text), chunk_size=100)))
+    assert [(command_class, frame.frame) for command_class, frame in found] == expected
+
+
+def test_read_binary():
+    durations, _ = _durations()
+    chunks = list(read_binary(io.BytesIO(durations.tobytes()), chunk_size=7))
+    assert array.array("I", [_ for chunk in chunks for _ in chunk]) == durations